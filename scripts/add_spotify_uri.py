@@ -4,11 +4,19 @@ Script to add Spotify URI column to artists_SpotifyID.csv
 
 This script reads the artists_SpotifyID.csv file and adds a new column called 'SpotifyURI'
 by combining the base Spotify artist URL with the spotifyID from each row.
+IDs are normalized and validated first; malformed and duplicate IDs are
+written to a separate report instead of the output.
 """
 
 import pandas as pd
 import os
 
+from setup.logger import get_logger
+from setup.profiler import profile_stage, run_profiled
+from spotify_ids import clean_id_table
+
+logger = get_logger(__name__)
+
 
 def add_spotify_uri():
     """
@@ -17,6 +25,7 @@ def add_spotify_uri():
     # Define file paths
     input_file = "resources/artists_SpotifyID.csv"
     output_file = "jupyter/artists_SpotifyID_with_uri.csv"
+    rejected_file = "jupyter/artists_SpotifyID_rejected.csv"
 
     # Base Spotify artist URL
     spotify_base_url = "https://open.spotify.com/artist/"
@@ -29,7 +38,8 @@ def add_spotify_uri():
     try:
         # Read the CSV file
         print(f"Reading {input_file}...")
-        df = pd.read_csv(input_file)
+        with profile_stage('read_csv'):
+            df = pd.read_csv(input_file)
 
         # Display basic info about the dataframe
         print(f"DataFrame shape: {df.shape}")
@@ -37,9 +47,24 @@ def add_spotify_uri():
         print(f"First few rows:")
         print(df.head())
 
+        # Normalize and validate IDs before building URIs
+        print("\nValidating Spotify IDs...")
+        with profile_stage('validate_ids'):
+            df, rejected = clean_id_table(df, 'spotifyID')
+            # Keep the raw value in the rejected report, the normalized one in the output
+            df['spotifyID'] = df.pop('spotify_id')
+            rejected = rejected.drop(columns='spotify_id')
+
+        if len(rejected):
+            rejected.to_csv(rejected_file, index=False)
+            logger.warning(
+                f"Rejected {len(rejected)} invalid or duplicate IDs "
+                f"({rejected['error'].value_counts().to_dict()}); saved to {rejected_file}")
+
         # Add the SpotifyURI column
         print("\nAdding SpotifyURI column...")
-        df['SpotifyURI'] = spotify_base_url + df['spotifyID']
+        with profile_stage('build_uris'):
+            df['SpotifyURI'] = spotify_base_url + df['spotifyID']
 
         # Display a few examples of the new URIs
         print("\nExamples of generated Spotify URIs:")
@@ -48,7 +73,8 @@ def add_spotify_uri():
 
         # Save the updated dataframe
         print(f"\nSaving to {output_file}...")
-        df.to_csv(output_file, index=False)
+        with profile_stage('write_csv'):
+            df.to_csv(output_file, index=False)
 
         print(f"Success! Updated CSV saved to {output_file}")
         print(f"Total rows processed: {len(df)}")
@@ -64,4 +90,4 @@ def add_spotify_uri():
 
 
 if __name__ == "__main__":
-    add_spotify_uri()
+    run_profiled(add_spotify_uri)
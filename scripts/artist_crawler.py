@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Related-artist crawler
+
+Grows the artist catalog beyond what Wikidata knows. Starting from the seed
+list (resources/artists_SpotifyID.csv), it repeatedly expands the most
+popular unexpanded artist through its related artists and the featured
+artists credited on its top tracks.
+
+  * Frontier: a max-heap on popularity; every ID enters it at most once
+    (the `seen` set).
+  * IDs discovered without metadata (seeds, featured credits) are resolved
+    in sp.artists batches of 50 before they are prioritized.
+  * Expansions run concurrently in a thread pool. A failed batch lookup or
+    expansion is queued again, up to MAX_ATTEMPTS times per artist; when a
+    whole round fails, or only retries are left, the crawl backs off
+    exponentially before trying again.
+  * The frontier, seen set and counters are checkpointed to disk, so an
+    interrupted crawl resumes where it stopped. Discovered artists are
+    appended to a JSON-lines file, which is cut back to its checkpointed
+    size on resume so no artist is written twice.
+
+Usage:
+    python scripts/artist_crawler.py --max-artists 200000
+    python scripts/artist_crawler.py --fresh          # ignore the checkpoint
+"""
+
+import argparse
+import heapq
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+from spotipy.exceptions import SpotifyException
+
+from projection import fetch_batch, project
+from setup.logger import get_logger, ProgressReporter
+from setup.profiler import profile_stage, run_profiled
+from spotify_ids import clean_id_table
+
+logger = get_logger(__name__)
+
+SEED_FILE = "resources/artists_SpotifyID.csv"
+CRAWL_DIR = "jupyter/crawl"
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 3
+# Seconds to wait after a round that made no progress, doubled per such round
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+# Consecutive 404s from the related-artists endpoint before giving up on it
+RELATED_UNAVAILABLE_AFTER = 3
+
+
+class ArtistCrawler:
+    """Frontier-based expansion of the artist graph"""
+
+    def __init__(self, sp, crawl_dir: str = CRAWL_DIR, workers: int = 8,
+                 checkpoint_every: int = 500):
+        self.sp = sp
+        self.crawl_dir = crawl_dir
+        self.workers = workers
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_file = os.path.join(crawl_dir, 'checkpoint.json')
+        self.artists_file = os.path.join(crawl_dir, 'artists.jsonl')
+        os.makedirs(crawl_dir, exist_ok=True)
+
+        # Heap entries are (-popularity, depth, spotify_id)
+        self.frontier: List[Tuple[int, int, str]] = []
+        self.seen = set()
+        # IDs known but without popularity yet: (spotify_id, depth)
+        self.pending: List[Tuple[str, int]] = []
+        # Failed attempts per ID; IDs that used up MAX_ATTEMPTS are abandoned
+        self.attempts: Dict[str, int] = {}
+        self.abandoned: List[str] = []
+        self.stats = {'expanded': 0, 'discovered': 0, 'api_calls': 0,
+                      'duplicate_refs': 0, 'errors': 0, 'retries': 0}
+        # Also guards the related-endpoint state below, shared by workers
+        self._calls_lock = threading.Lock()
+        self._related_available = True
+        self._related_404s = 0
+
+    # State
+
+    def add_seeds(self, spotify_ids):
+        for spotify_id in spotify_ids:
+            if spotify_id not in self.seen:
+                self.seen.add(spotify_id)
+                self.pending.append((spotify_id, 0))
+
+    def load_checkpoint(self) -> bool:
+        if not os.path.exists(self.checkpoint_file):
+            return False
+        with open(self.checkpoint_file, encoding='utf-8') as f:
+            state = json.load(f)
+        self.frontier = [tuple(e) for e in state['frontier']]
+        heapq.heapify(self.frontier)
+        self.seen = set(state['seen'])
+        self.pending = [tuple(e) for e in state['pending']]
+        self.stats.update(state['stats'])
+        self.attempts = state.get('attempts', {})
+        self.abandoned = state.get('abandoned', [])
+        self._related_available = state.get('related_available', True)
+        # Drop artists written after the checkpoint; they are rediscovered
+        if os.path.exists(self.artists_file):
+            with open(self.artists_file, 'r+b') as f:
+                f.truncate(state['artists_bytes'])
+        return True
+
+    def save_checkpoint(self):
+        with profile_stage('checkpoint'):
+            tmp_path = self.checkpoint_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'frontier': self.frontier,
+                    'seen': list(self.seen),
+                    'pending': self.pending,
+                    'stats': self.stats,
+                    'attempts': self.attempts,
+                    'abandoned': self.abandoned,
+                    'artists_bytes': os.path.getsize(self.artists_file)
+                    if os.path.exists(self.artists_file) else 0,
+                    'related_available': self._related_available
+                }, f)
+            os.replace(tmp_path, self.checkpoint_file)
+
+    # API access
+
+    def _retry(self, spotify_id: str) -> bool:
+        """Count a failed attempt; True if the ID should be queued again"""
+        self.stats['errors'] += 1
+        self.attempts[spotify_id] = self.attempts.get(spotify_id, 0) + 1
+        if self.attempts[spotify_id] < MAX_ATTEMPTS:
+            self.stats['retries'] += 1
+            return True
+        self.abandoned.append(spotify_id)
+        return False
+
+    def _call(self, func, *args):
+        with self._calls_lock:
+            self.stats['api_calls'] += 1
+        return func(*args)
+
+    def _resolve_pending(self, executor: ThreadPoolExecutor, out) -> int:
+        """Fetch metadata for pending IDs in batches of 50 and push them"""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, []
+        depths = dict(pending)
+        ids = [spotify_id for spotify_id, _ in pending]
+        batches = [ids[i:i + BATCH_SIZE] for i in range(0, len(ids), BATCH_SIZE)]
+
+        def fetch(batch):
+            try:
+                return batch, self._call(fetch_batch, self.sp, 'artist', batch)
+            except Exception as e:
+                logger.warning(f"Batch lookup of {len(batch)} artists failed: {e}")
+                return batch, None
+
+        resolved = 0
+        with profile_stage('resolve_batches'):
+            for batch, records in executor.map(fetch, batches):
+                if records is None:
+                    # Back into pending for the next round
+                    self.pending.extend((spotify_id, depths[spotify_id]) for spotify_id in batch
+                                        if self._retry(spotify_id))
+                    continue
+                for spotify_id, record in zip(batch, records):
+                    if record is not None:
+                        self._push(record._asdict(), depths[spotify_id], out)
+                        resolved += 1
+        return resolved
+
+    def _expand(self, spotify_id: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Return (related artist records, featured artist IDs) for one artist"""
+        related: List[Dict[str, Any]] = []
+        featured: List[str] = []
+
+        if self._related_available:
+            try:
+                payload = self._call(self.sp.artist_related_artists, spotify_id) or {}
+                related = [project(a, 'artist')._asdict() for a in payload.get('artists') or []]
+                with self._calls_lock:
+                    self._related_404s = 0
+            except SpotifyException as e:
+                # The endpoint is unavailable to some apps; fall back to credits only.
+                # 403 says so directly; a 404 could also be one odd artist
+                with self._calls_lock:
+                    if e.http_status == 404:
+                        self._related_404s += 1
+                    unavailable = (e.http_status == 403
+                                   or self._related_404s >= RELATED_UNAVAILABLE_AFTER)
+                    newly_unavailable = unavailable and self._related_available
+                    if unavailable:
+                        self._related_available = False
+                if newly_unavailable:
+                    logger.warning(f"Related-artists endpoint unavailable ({e}); "
+                                   "expanding through track credits only")
+                if not unavailable and e.http_status != 404:
+                    raise
+
+        payload = self._call(self.sp.artist_top_tracks, spotify_id) or {}
+        for track in payload.get('tracks') or []:
+            for artist in track.get('artists') or []:
+                if artist and artist.get('id') and artist['id'] != spotify_id:
+                    featured.append(artist['id'])
+
+        return related, featured
+
+    # Crawl loop
+
+    def _backoff(self, failed_rounds: int):
+        """Wait before retrying after `failed_rounds` rounds without progress"""
+        delay = min(RETRY_DELAY * 2 ** (failed_rounds - 1), MAX_RETRY_DELAY)
+        logger.debug(f"No progress in the last round; retrying in {delay:.0f}s")
+        with profile_stage('retry_backoff'):
+            time.sleep(delay)
+
+    def _push(self, record: Dict[str, Any], depth: int, out):
+        heapq.heappush(self.frontier, (-int(record['popularity'] or 0), depth, record['id']))
+        out.write(json.dumps(dict(record, depth=depth)) + '\n')
+        self.stats['discovered'] += 1
+
+    def crawl(self, max_artists: int, max_expansions: Optional[int] = None):
+        """Expand the frontier until enough artists are discovered"""
+        progress = ProgressReporter(max_artists, "Discovered artists", logger)
+        last_checkpoint = self.stats['expanded']
+        failed_rounds = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor, \
+                open(self.artists_file, 'a', encoding='utf-8') as out:
+            while self.stats['discovered'] < max_artists:
+                if max_expansions is not None and self.stats['expanded'] >= max_expansions:
+                    break
+
+                progress.update(self._resolve_pending(executor, out))
+                if not self.frontier:
+                    if not self.pending:
+                        break
+                    # Only failed lookups are left; give the API time to recover
+                    failed_rounds += 1
+                    self._backoff(failed_rounds)
+                    continue
+
+                # Expand the most popular artists of the frontier together
+                round_size = min(self.workers * 2, len(self.frontier))
+                batch = [heapq.heappop(self.frontier) for _ in range(round_size)]
+
+                def expand(entry):
+                    try:
+                        return entry, self._expand(entry[2])
+                    except Exception as e:
+                        logger.warning(f"Expanding {entry[2]} failed: {e}")
+                        return entry, None
+
+                with profile_stage('expand'):
+                    results = list(executor.map(expand, batch))
+
+                for entry, result in results:
+                    neg_pop, depth, spotify_id = entry
+                    if result is None:
+                        if self._retry(spotify_id):
+                            heapq.heappush(self.frontier, entry)
+                        continue
+                    self.stats['expanded'] += 1
+                    related, featured = result
+                    before = self.stats['discovered']
+                    for record in related:
+                        if record['id'] in self.seen:
+                            self.stats['duplicate_refs'] += 1
+                            continue
+                        self.seen.add(record['id'])
+                        self._push(record, depth + 1, out)
+                    for artist_id in featured:
+                        if artist_id in self.seen:
+                            self.stats['duplicate_refs'] += 1
+                            continue
+                        self.seen.add(artist_id)
+                        self.pending.append((artist_id, depth + 1))
+                    progress.update(self.stats['discovered'] - before)
+
+                if all(result is None for _, result in results):
+                    # The whole round failed (e.g. rate limited); wait before
+                    # the re-queued artists come up again
+                    failed_rounds += 1
+                    if self.frontier:
+                        self._backoff(failed_rounds)
+                else:
+                    failed_rounds = 0
+
+                if self.stats['expanded'] - last_checkpoint >= self.checkpoint_every:
+                    out.flush()
+                    self.save_checkpoint()
+                    last_checkpoint = self.stats['expanded']
+
+            out.flush()
+            self.save_checkpoint()
+        progress.close()
+        return self.stats
+
+    def efficiency(self) -> Dict[str, float]:
+        calls = max(self.stats['api_calls'], 1)
+        refs = self.stats['discovered'] + self.stats['duplicate_refs']
+        return {
+            'discovered_per_call': self.stats['discovered'] / calls,
+            'duplicate_ref_rate': self.stats['duplicate_refs'] / refs if refs else 0.0,
+            'frontier_size': len(self.frontier),
+            'pending': len(self.pending),
+            'abandoned': len(self.abandoned)
+        }
+
+
+def load_seed_ids(path: str = SEED_FILE) -> List[str]:
+    df = pd.read_csv(path)
+    clean, rejected = clean_id_table(df, 'spotifyID')
+    if len(rejected):
+        logger.warning(f"Skipping {len(rejected)} invalid or duplicate seed IDs")
+    return clean['spotify_id'].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl related and featured artists")
+    parser.add_argument('--max-artists', type=int, default=100000,
+                        help='Stop after discovering this many artists (seeds included)')
+    parser.add_argument('--max-expansions', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--fresh', action='store_true', help='Ignore any existing checkpoint')
+    args = parser.parse_args()
+
+    from setup.setupClient import setup_spotify_client
+
+    crawler = ArtistCrawler(setup_spotify_client(), workers=args.workers)
+    if not args.fresh and crawler.load_checkpoint():
+        logger.info(f"Resuming crawl: {crawler.stats['discovered']} artists discovered, "
+                    f"{len(crawler.frontier)} in frontier")
+    else:
+        if os.path.exists(crawler.artists_file):
+            os.remove(crawler.artists_file)
+        crawler.add_seeds(load_seed_ids())
+        logger.info(f"Starting crawl from {len(crawler.pending)} seed artists")
+
+    start = time.perf_counter()
+    stats = crawler.crawl(args.max_artists, args.max_expansions)
+    elapsed = time.perf_counter() - start
+    efficiency = crawler.efficiency()
+    logger.info(
+        f"Crawl stopped: {stats['discovered']} artists, {stats['expanded']} expanded, "
+        f"{stats['api_calls']} API calls ({efficiency['discovered_per_call']:.2f} new artists/call), "
+        f"{elapsed:.1f}s", extra={'fields': dict(stats, **efficiency)})
+
+
+if __name__ == "__main__":
+    run_profiled(main, 'artist_crawler')
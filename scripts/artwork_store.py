@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Optional artwork stage for enriched artist data
+
+Downloads the image_url of every artist in artists_detailed_data.csv into a
+content-addressed local store (files are named by their SHA-256, so the same
+image shared by several artists is kept once), generates thumbnails in a
+process pool and records image dimensions in a manifest. Reports and the
+notebook can then render artwork from local files with no CDN traffic.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional, Iterable
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from setup.logger import get_logger, ProgressReporter
+from setup.profiler import profile_stage, run_profiled
+
+logger = get_logger(__name__)
+
+
+STORE_DIR = "jupyter/artwork"
+THUMBNAIL_SIZE = (160, 160)
+
+
+def _object_path(store_dir: str, digest: str, suffix: str = '') -> str:
+    """Path of a stored object, fanned out by the first two hex chars"""
+    return os.path.join(store_dir, 'objects', digest[:2], digest + suffix)
+
+
+def _make_thumbnail(args) -> Dict[str, Any]:
+    """Create a thumbnail and read image dimensions (runs in a worker process)"""
+    from PIL import Image
+
+    source, target, size = args
+    try:
+        with Image.open(source) as img:
+            width, height = img.size
+            if not os.path.exists(target):
+                img = img.convert('RGB')
+                img.thumbnail(size)
+                img.save(target, 'JPEG', quality=85)
+    except Exception as e:
+        return {'error': str(e)}
+
+    return {'width': width, 'height': height}
+
+
+class ArtworkStore:
+    """Content-addressed local store for artist artwork"""
+
+    def __init__(self, store_dir: str = STORE_DIR, max_workers: int = 16):
+        """Open (or create) the store and load its manifest"""
+        self.store_dir = store_dir
+        self.max_workers = max_workers
+        self.manifest_file = os.path.join(store_dir, 'manifest.json')
+        os.makedirs(os.path.join(store_dir, 'objects'), exist_ok=True)
+
+        # url -> {'sha256', 'path', 'thumbnail', 'width', 'height'}
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        """One pooled session per download thread for connection reuse"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._local.session = session
+        return session
+
+    def local_path(self, url: str, thumbnail: bool = False) -> Optional[str]:
+        """Return the local file for an image URL, if it has been stored"""
+        entry = self.manifest.get(url)
+        if not entry:
+            return None
+        return entry.get('thumbnail') if thumbnail else entry['path']
+
+    def _download(self, url: str) -> Dict[str, Any]:
+        """Download one image and write it into the store"""
+        response = self._session().get(url, timeout=30)
+        response.raise_for_status()
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+
+        path = _object_path(self.store_dir, digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Threads downloading the same image each need their own temp file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            except OSError:
+                # Another thread stored the same content first
+                if not os.path.exists(path):
+                    raise
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        return {'sha256': digest, 'path': path,
+                'content_type': response.headers.get('Content-Type', '')}
+
+    def fetch(self, urls: Iterable[str]) -> Dict[str, int]:
+        """Download every URL not yet in the store and build thumbnails"""
+        pending = sorted({u for u in urls if u and u not in self.manifest})
+        stats = {'requested': len(pending), 'downloaded': 0, 'failed': 0}
+
+        logger.info(f"Downloading {len(pending)} new images with {self.max_workers} workers...")
+        progress = ProgressReporter(len(pending), "Downloading artwork", logger)
+        with profile_stage('download'), ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._download, url): url for url in pending}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    self.manifest[url] = future.result()
+                    stats['downloaded'] += 1
+                    progress.update()
+                except Exception as e:
+                    stats['failed'] += 1
+                    logger.warning(f"Download failed for {url}: {e}")
+                    progress.update(failed=1)
+        progress.close()
+
+        # Record the downloads before the optional thumbnail step
+        with profile_stage('save_manifest'):
+            self.save()
+        with profile_stage('thumbnails'):
+            if self.build_thumbnails():
+                self.save()
+        return stats
+
+    def build_thumbnails(self) -> int:
+        """Generate missing thumbnails and dimensions in a process pool
+
+        Returns the number of thumbnails created; without Pillow, none are.
+        """
+        # Several URLs can share one object; process each digest once
+        by_digest: Dict[str, List[str]] = {}
+        for url, entry in self.manifest.items():
+            if 'thumbnail' not in entry:
+                by_digest.setdefault(entry['sha256'], []).append(url)
+
+        if not by_digest:
+            return 0
+
+        if importlib.util.find_spec('PIL') is None:
+            logger.warning("Pillow is not installed; skipping thumbnails")
+            return 0
+
+        jobs = []
+        for digest, urls in by_digest.items():
+            source = self.manifest[urls[0]]['path']
+            target = _object_path(self.store_dir, digest, '.thumb.jpg')
+            jobs.append((digest, (source, target, THUMBNAIL_SIZE)))
+
+        logger.info(f"Generating {len(jobs)} thumbnails...")
+        created = 0
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(_make_thumbnail, [args for _, args in jobs],
+                                   chunksize=32)
+            for (digest, args), result in zip(jobs, results):
+                if 'error' in result:
+                    logger.warning(f"Thumbnail failed for {args[0]}: {result['error']}")
+                    continue
+                for url in by_digest[digest]:
+                    self.manifest[url].update(result, thumbnail=args[1])
+                created += 1
+        return created
+
+    def save(self):
+        """Write the manifest"""
+        tmp_path = self.manifest_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_file)
+
+
+def fetch_artwork():
+    """Download artwork for every artist in the enrichment output"""
+    input_file = "jupyter/artists_detailed_data.csv"
+
+    if not os.path.exists(input_file):
+        logger.error(f"Input file '{input_file}' not found. Please run fetch_artist_data.py first.")
+        return
+
+    df = pd.read_csv(input_file, usecols=['image_url'])
+    urls = df['image_url'].dropna().unique()
+
+    store = ArtworkStore()
+    stats = store.fetch(urls)
+
+    unique_objects = len({e['sha256'] for e in store.manifest.values()})
+    logger.info(
+        f"Summary: {stats['requested']} images requested, {stats['downloaded']} downloaded, "
+        f"{stats['failed']} failed, {unique_objects} unique images in store",
+        extra={'fields': dict(stats, unique_objects=unique_objects)})
+
+
+if __name__ == "__main__":
+    run_profiled(fetch_artwork)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Crawl efficiency benchmark for artist_crawler
+
+Runs ArtistCrawler against a synthetic artist graph with a fixed per-call
+latency and reports, for each worker count, how many artists were found,
+how many API calls that took, the share of references that pointed at an
+already-seen artist and the wall time. --failure-rate makes a share of the
+calls fail with a 500 to exercise the crawler's retries. No credentials
+needed.
+
+Usage:
+    python scripts/benchmark_crawler.py --artists 50000 --target 20000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from typing import Dict, List, Any
+
+from spotipy.exceptions import SpotifyException
+
+from artist_crawler import ArtistCrawler
+from setup.profiler import profile_stage, run_profiled
+
+BASE62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+class MockSpotify:
+    """Stands in for spotipy.Spotify over a random artist graph
+
+    Popularity is skewed so a few artists are very popular; related artists
+    and featured credits are drawn with a bias towards popular artists, like
+    the real graph.
+    """
+
+    def __init__(self, n_artists: int, latency: float, seed: int = 0,
+                 failure_rate: float = 0.0):
+        rng = random.Random(seed)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._failures = random.Random(seed + 1)
+        self.calls = 0
+        self.ids = [''.join(rng.choices(BASE62, k=22)) for _ in range(n_artists)]
+        self.popularity = {i: min(100, int(rng.paretovariate(1.5) * 10)) for i in self.ids}
+        weights = [self.popularity[i] + 1 for i in self.ids]
+
+        self.related = {i: rng.choices(self.ids, weights, k=20) for i in self.ids}
+        self.tracks = {}
+        for artist_id in self.ids:
+            self.tracks[artist_id] = [
+                [artist_id] + rng.choices(self.ids, weights, k=rng.choice([0, 0, 1, 2]))
+                for _ in range(10)
+            ]
+
+    def _wait(self):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self._failures.random() < self.failure_rate:
+            raise SpotifyException(500, -1, "mock server error")
+
+    def _artist(self, artist_id: str) -> Dict[str, Any]:
+        return {'id': artist_id, 'name': f"Artist {artist_id[:6]}",
+                'popularity': self.popularity[artist_id],
+                'followers': {'total': self.popularity[artist_id] * 1000},
+                'genres': [], 'images': [], 'href': ''}
+
+    def artists(self, ids: List[str]):
+        self._wait()
+        return {'artists': [self._artist(i) if i in self.popularity else None for i in ids]}
+
+    def artist_related_artists(self, artist_id: str):
+        self._wait()
+        return {'artists': [self._artist(i) for i in self.related[artist_id] if i != artist_id]}
+
+    def artist_top_tracks(self, artist_id: str):
+        self._wait()
+        return {'tracks': [
+            {'id': f"t{n}", 'artists': [{'id': a, 'name': f"Artist {a[:6]}"} for a in credits]}
+            for n, credits in enumerate(self.tracks[artist_id])
+        ]}
+
+
+def run(graph: MockSpotify, seeds: List[str], workers: int, target: int) -> Dict[str, Any]:
+    graph.calls = 0
+    with tempfile.TemporaryDirectory() as crawl_dir:
+        crawler = ArtistCrawler(graph, crawl_dir, workers=workers)
+        crawler.add_seeds(seeds)
+        start = time.perf_counter()
+        stats = crawler.crawl(target)
+        elapsed = time.perf_counter() - start
+        return dict(stats, **crawler.efficiency(), workers=workers, elapsed=elapsed,
+                    upstream_calls=graph.calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the related-artist crawler")
+    parser.add_argument('--artists', type=int, default=50000, help='Size of the synthetic graph')
+    parser.add_argument('--seeds', type=int, default=500)
+    parser.add_argument('--target', type=int, default=20000, help='Artists to discover')
+    parser.add_argument('--latency', type=float, default=0.005, help='Seconds per API call')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='Share of API calls that fail with a 500')
+    args = parser.parse_args()
+
+    print(f"Building graph of {args.artists} artists...")
+    with profile_stage('build_graph'):
+        graph = MockSpotify(args.artists, args.latency, failure_rate=args.failure_rate)
+    seeds = random.Random(1).sample(graph.ids, args.seeds)
+
+    print(f"{'workers':>8} {'found':>8} {'expanded':>9} {'calls':>7} "
+          f"{'found/call':>11} {'dup refs':>9} {'retries':>8} {'abandoned':>10} "
+          f"{'time':>8} {'found/s':>9}")
+    for workers in args.workers:
+        r = run(graph, seeds, workers, args.target)
+        print(f"{r['workers']:>8} {r['discovered']:>8} {r['expanded']:>9} {r['api_calls']:>7} "
+              f"{r['discovered_per_call']:>11.2f} {r['duplicate_ref_rate']:>9.1%} "
+              f"{r['retries']:>8} {r['abandoned']:>10} "
+              f"{r['elapsed']:>7.2f}s {r['discovered'] / r['elapsed']:>9.0f}")
+
+
+if __name__ == "__main__":
+    run_profiled(main, 'benchmark_crawler')
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Load test for the lookup service
+
+Starts lookup_service against a fake Spotify upstream with fixed latency,
+fires concurrent keep-alive clients at it and reports throughput, latency
+percentiles and how many upstream calls were needed. The same load is run
+with request coalescing disabled for comparison. No credentials needed.
+
+Usage:
+    python scripts/benchmark_lookup_service.py --clients 50 --requests 200
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Any
+
+from lookup_service import LookupService, MetadataStore, BatchCoalescer
+from setup.profiler import profile_stage, run_profiled
+
+
+class FakeSpotify:
+    """Stands in for spotipy.Spotify with a fixed per-call latency"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def _items(self, ids: List[str], kind: str) -> List[Dict[str, Any]]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return [{'id': i, 'name': f"{kind} {i}", 'popularity': 50,
+                 'followers': {'total': 1000}, 'genres': ['pop']} for i in ids]
+
+    def artists(self, ids):
+        return {'artists': self._items(ids, 'artist')}
+
+    def tracks(self, ids):
+        return {'tracks': self._items(ids, 'track')}
+
+
+async def http_get(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str) -> int:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':')[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port: int, ids: List[str], n: int, latencies: List[float]):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for _ in range(n):
+        path = f"/artist/{random.choice(ids)}"
+        start = time.perf_counter()
+        await http_get(reader, writer, path)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run_load(args, coalesce: bool) -> Dict[str, Any]:
+    upstream = FakeSpotify(args.latency)
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = MetadataStore(store_dir)
+        # Skip the CSV seed so every ID starts as a miss
+        store.records = {'artist': {}, 'track': {}}
+        service = LookupService(store, upstream)
+        if not coalesce:
+            service.coalescers['artist'] = BatchCoalescer(
+                service.coalescers['artist'].fetch_batch, window=0, max_batch=1)
+
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        ids = [f"{i:022d}" for i in range(args.unique_ids)]
+        latencies: List[float] = []
+        start = time.perf_counter()
+        await asyncio.gather(*(client(port, ids, args.requests, latencies)
+                               for _ in range(args.clients)))
+        elapsed = time.perf_counter() - start
+
+        server.close()
+        await server.wait_closed()
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'elapsed_s': elapsed,
+        'req_per_s': len(latencies) / elapsed,
+        'p50_ms': 1000 * statistics.median(latencies),
+        'p99_ms': 1000 * latencies[int(0.99 * (len(latencies) - 1))],
+        'upstream_calls': upstream.calls
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lookup service load test")
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per client')
+    parser.add_argument('--unique-ids', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Fake upstream latency per call in seconds')
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients x {args.requests} requests, "
+          f"{args.unique_ids} unique IDs, {args.latency * 1000:.0f} ms upstream latency\n")
+    for label, coalesce in (('coalesced', True), ('uncoalesced', False)):
+        with profile_stage(label):
+            r = asyncio.run(run_load(args, coalesce))
+        print(f"{label:12} {r['req_per_s']:9.0f} req/s | p50 {r['p50_ms']:7.2f} ms | "
+              f"p99 {r['p99_ms']:7.2f} ms | upstream calls {r['upstream_calls']}")
+
+
+if __name__ == "__main__":
+    run_profiled(main, 'benchmark_lookup_service')
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Data quality checks over the enrichment output
+
+Streams artists_detailed_data.csv in chunks and
+  * tracks null and zero rates per field,
+  * flags failed fetches, rows with zero followers and zero popularity,
+    names that don't match the Wikidata label, and follower counts that
+    dropped sharply since the previous snapshot,
+  * writes suspect Spotify IDs to a re-fetch queue.
+
+`--refetch` then fetches only the queued IDs (in batches of 50) and patches
+their rows in place, instead of rerunning fetch_artist_data for everything.
+Re-fetched values are also written to the snapshot and the genre index: if
+Spotify returns the same low follower count again, the drop is confirmed and
+becomes the baseline for the next validation instead of staying flagged.
+Likewise a zero-metrics row or a name that differs from the Wikidata label
+is marked confirmed once re-fetched; it is still counted in the report but
+not queued again unless the row changes.
+
+Usage:
+    python scripts/data_quality.py             # validate and queue suspects
+    python scripts/data_quality.py --refetch   # re-fetch queued IDs
+"""
+
+import argparse
+import difflib
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Any, Optional
+
+import pandas as pd
+
+from setup.logger import get_logger
+from setup.profiler import profile_stage, run_profiled
+
+logger = get_logger(__name__)
+
+INPUT_FILE = "jupyter/artists_detailed_data.csv"
+SNAPSHOT_FILE = "jupyter/quality_snapshot.csv"
+REPORT_FILE = "jupyter/quality_report.json"
+REFETCH_QUEUE = "jupyter/refetch_queue.csv"
+
+CHUNK_SIZE = 5000
+FOLLOWER_DROP = 0.9            # flag drops of 90% or more...
+MIN_PREVIOUS_FOLLOWERS = 1000  # ...from artists that had at least this many
+NAME_SIMILARITY = 0.6
+
+NUMERIC_FIELDS = ['followers', 'popularity']
+TEXT_FIELDS = ['name', 'image_url', 'href', 'genres']
+SNAPSHOT_COLUMNS = ['spotify_id', 'name', 'followers', 'popularity', 'confirmed']
+# Anomalies a re-fetch can confirm but not fix
+CONFIRMABLE = ['zero_metrics', 'name_mismatch']
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation for name comparison"""
+    name = unicodedata.normalize('NFKD', str(name))
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return re.sub(r'[^0-9a-z]+', ' ', name.casefold()).strip()
+
+
+def name_similarity(a: pd.Series, b: pd.Series) -> pd.Series:
+    """Similarity ratio of two name columns (1.0 when equal after normalization)"""
+    a = a.fillna('').map(normalize_name)
+    b = b.fillna('').map(normalize_name)
+    similarity = pd.Series(1.0, index=a.index)
+    # Only fall back to difflib for the (few) rows that differ
+    differ = a != b
+    similarity[differ] = [difflib.SequenceMatcher(None, x, y).ratio()
+                          for x, y in zip(a[differ], b[differ])]
+    return similarity
+
+
+class QualityValidator:
+    """Accumulate field statistics and suspect rows over streamed chunks"""
+
+    def __init__(self, previous: Optional[pd.DataFrame] = None):
+        self.previous = previous
+        self.rows = 0
+        self.nulls: Counter = Counter()
+        self.zeros: Counter = Counter()
+        self.confirmed: Counter = Counter()
+        self.suspects: List[pd.DataFrame] = []
+        self.snapshot: List[pd.DataFrame] = []
+
+    def _confirmed(self, chunk: pd.DataFrame) -> pd.Series:
+        """Rows unchanged since a re-fetch confirmed them"""
+        confirmed = pd.Series(False, index=chunk.index)
+        if self.previous is None:
+            return confirmed
+        previous = self.previous.reindex(chunk['spotify_id'].to_numpy())
+        previous.index = chunk.index
+        same = previous['confirmed'].fillna(False).astype(bool)
+        for field in ['name', 'followers', 'popularity']:
+            same &= (previous[field] == chunk[field]).fillna(False).astype(bool)
+        return same
+
+    def observe(self, chunk: pd.DataFrame):
+        """Validate one chunk of enrichment output"""
+        self.rows += len(chunk)
+        ok = chunk['fetch_ok'].astype(bool)
+        confirmed = self._confirmed(chunk)
+
+        for field in NUMERIC_FIELDS:
+            self.nulls[field] += int(chunk[field].isna().sum())
+            self.zeros[field] += int((chunk[field] == 0).sum())
+        for field in TEXT_FIELDS:
+            self.nulls[field] += int((chunk[field].isna() | (chunk[field] == '')).sum())
+
+        checks = {
+            'fetch_failed': ~ok,
+            'zero_metrics': ok & (chunk['followers'] == 0) & (chunk['popularity'] == 0),
+            'name_mismatch': ok & (name_similarity(chunk['name'], chunk['wikidata_label'])
+                                   < NAME_SIMILARITY),
+        }
+
+        if self.previous is not None:
+            before = chunk['spotify_id'].map(self.previous['followers'])
+            dropped = (before >= MIN_PREVIOUS_FOLLOWERS) & (
+                chunk['followers'] <= before * (1 - FOLLOWER_DROP))
+            checks['follower_drop'] = ok & dropped.fillna(False).astype(bool)
+
+        suspect = pd.Series(False, index=chunk.index)
+        for reason, mask in checks.items():
+            mask = mask.fillna(False).astype(bool)
+            if reason in CONFIRMABLE:
+                if (mask & confirmed).any():
+                    self.confirmed[reason] += int((mask & confirmed).sum())
+                    mask &= ~confirmed
+            suspect |= mask
+            if mask.any():
+                self.suspects.append(pd.DataFrame({
+                    'spotify_id': chunk.loc[mask, 'spotify_id'],
+                    'reason': reason
+                }))
+
+        # Only trust healthy rows as the baseline for the next run
+        healthy = ~suspect
+        if healthy.any():
+            self.snapshot.append(chunk.loc[healthy, SNAPSHOT_COLUMNS[:-1]].assign(
+                confirmed=confirmed[healthy]))
+
+    def suspect_ids(self) -> pd.DataFrame:
+        if not self.suspects:
+            return pd.DataFrame(columns=['spotify_id', 'reason'])
+        suspects = pd.concat(self.suspects, ignore_index=True)
+        # One row per ID, all reasons joined
+        return suspects.groupby('spotify_id', sort=False)['reason'].agg(','.join).reset_index()
+
+    def report(self) -> Dict[str, Any]:
+        rows = max(self.rows, 1)
+        reasons = Counter()
+        for frame in self.suspects:
+            reasons.update(frame['reason'].value_counts().to_dict())
+        return {
+            'rows': self.rows,
+            'null_rate': {f: round(self.nulls[f] / rows, 4) for f in NUMERIC_FIELDS + TEXT_FIELDS},
+            'zero_rate': {f: round(self.zeros[f] / rows, 4) for f in NUMERIC_FIELDS},
+            'suspects': dict(reasons),
+            'confirmed': dict(self.confirmed),
+            'suspect_ids': len(self.suspect_ids())
+        }
+
+    def merged_snapshot(self) -> pd.DataFrame:
+        """Previous snapshot updated with this run's healthy rows"""
+        if not self.snapshot:
+            # Header-only input yields no chunks
+            current = pd.DataFrame(columns=SNAPSHOT_COLUMNS).set_index('spotify_id')
+        else:
+            current = pd.concat(self.snapshot, ignore_index=True).set_index('spotify_id')
+        if self.previous is None:
+            return current
+        return merge_snapshots(self.previous, current)
+
+
+def merge_snapshots(previous: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """Previous snapshot with the rows of `current` replaced or added"""
+    kept = previous[~previous.index.isin(current.index)]
+    # Concatenating empty frames is deprecated
+    if kept.empty:
+        return current
+    if current.empty:
+        return kept
+    return pd.concat([kept, current])
+
+
+def load_snapshot() -> Optional[pd.DataFrame]:
+    if not os.path.exists(SNAPSHOT_FILE):
+        return None
+    return pd.read_csv(SNAPSHOT_FILE, index_col='spotify_id')
+
+
+def validate():
+    """Stream the enrichment output, write the report and the re-fetch queue"""
+    if not os.path.exists(INPUT_FILE):
+        logger.error(f"Input file '{INPUT_FILE}' not found. Please run fetch_artist_data.py first.")
+        return
+
+    validator = QualityValidator(load_snapshot())
+    with profile_stage('validate'):
+        dtypes = {'followers': 'Int64', 'popularity': 'Int64', 'spotify_id': 'string'}
+        for chunk in pd.read_csv(INPUT_FILE, chunksize=CHUNK_SIZE, dtype=dtypes,
+                                 keep_default_na=False, na_values={'followers': [''], 'popularity': ['']}):
+            validator.observe(chunk)
+
+    report = validator.report()
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    suspects = validator.suspect_ids()
+    suspects.to_csv(REFETCH_QUEUE, index=False)
+    validator.merged_snapshot().to_csv(SNAPSHOT_FILE)
+
+    logger.info(f"Validated {report['rows']} rows", extra={'fields': report})
+    for field, rate in report['null_rate'].items():
+        logger.info(f"  {field:12} null {rate:7.2%}  zero {report['zero_rate'].get(field, 0):7.2%}")
+    for reason, count in report['suspects'].items():
+        logger.warning(f"  {reason}: {count} rows")
+    for reason, count in report['confirmed'].items():
+        logger.info(f"  {reason}: {count} rows confirmed by an earlier re-fetch, not queued")
+    logger.info(f"{len(suspects)} suspect IDs queued in {REFETCH_QUEUE}")
+
+
+def refetch():
+    """Re-fetch only the queued suspect IDs and patch their rows"""
+    from fetch_artist_data import build_entry
+    from genre_index import GenreIndex
+    from projection import fetch_batch
+    from setup.setupClient import setup_spotify_client
+
+    if not os.path.exists(REFETCH_QUEUE):
+        logger.error(f"No re-fetch queue at '{REFETCH_QUEUE}'. Run data_quality.py first.")
+        return
+
+    queue = pd.read_csv(REFETCH_QUEUE, dtype={'spotify_id': 'string'})
+    if queue.empty:
+        logger.info("Re-fetch queue is empty.")
+        return
+
+    df = pd.read_csv(INPUT_FILE, dtype={'followers': 'Int64', 'popularity': 'Int64'},
+                     keep_default_na=False, na_values={'followers': [''], 'popularity': ['']})
+    labels = df.set_index('spotify_id')['wikidata_label']
+    ids = [i for i in queue['spotify_id'] if i in labels.index]
+
+    sp = setup_spotify_client()
+    entries = []
+    failed = 0
+    with profile_stage('refetch'):
+        for start in range(0, len(ids), 50):
+            batch = ids[start:start + 50]
+            try:
+                records = fetch_batch(sp, 'artist', batch)
+            except Exception as e:
+                logger.warning(f"Batch starting at {batch[0]} failed: {e}")
+                records = [None] * len(batch)
+            for spotify_id, record in zip(batch, records):
+                # A failed re-fetch leaves the existing row untouched
+                if record is None:
+                    failed += 1
+                else:
+                    entries.append(build_entry(spotify_id, labels[spotify_id], record))
+
+    if entries:
+        patched = pd.DataFrame(entries).set_index('spotify_id')
+        df = df.set_index('spotify_id')
+        df.update(patched)
+        df = df.reset_index().astype({'followers': 'Int64', 'popularity': 'Int64'})
+        df.to_csv(INPUT_FILE, index=False)
+
+        # A fresh answer from Spotify is accepted as the new baseline, which
+        # is how a confirmed follower drop, zero-metrics row or differing
+        # name stops being queued
+        snapshot = patched[SNAPSHOT_COLUMNS[1:-1]].assign(confirmed=True)
+        previous = load_snapshot()
+        if previous is not None:
+            snapshot = merge_snapshots(previous, snapshot)
+        snapshot.to_csv(SNAPSHOT_FILE, index_label='spotify_id')
+
+        genre_index = GenreIndex.load()
+        for spotify_id, entry in zip(patched.index, entries):
+            genre_index.add_artist_entry(spotify_id, entry)
+        genre_index.save()
+
+    logger.info(f"Re-fetched {len(entries)} artists ({failed} failed); "
+                f"run data_quality.py again to re-check them")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate enrichment output")
+    parser.add_argument('--refetch', action='store_true',
+                        help='Re-fetch the IDs queued by the last validation')
+    args = parser.parse_args()
+
+    if args.refetch:
+        refetch()
+    else:
+        validate()
+
+
+if __name__ == "__main__":
+    run_profiled(main, 'data_quality')
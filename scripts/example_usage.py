@@ -1,4 +1,5 @@
 from explorer_class import SpotifyAPIExplorer
+from setup.profiler import run_profiled
 
 
 def example_usage():
@@ -24,4 +25,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_profiled(main, 'example_usage')
@@ -28,9 +28,16 @@ class SpotifyAPIExplorer:
             print(f"   • {key}: {type(data[key]).__name__}")
 
     def print_sample_data(self, data: Dict[str, Any], max_length: int = 1000):
-        """Print sample JSON data"""
+        """Print sample JSON data, encoding only as much as will be shown"""
         print("\nSample data:")
-        print(json.dumps(data, indent=2)[:max_length] + "...")
+        chunks = []
+        length = 0
+        for chunk in json.JSONEncoder(indent=2).iterencode(data):
+            chunks.append(chunk)
+            length += len(chunk)
+            if length >= max_length:
+                break
+        print(''.join(chunks)[:max_length] + "...")
 
     def safe_api_call(self, func, *args, **kwargs) -> Optional[Any]:
         """Safely execute API calls with error handling"""
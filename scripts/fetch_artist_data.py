@@ -5,20 +5,55 @@ Script to fetch artist data from Spotify API using URIs from CSV
 This script reads the artists_SpotifyID_with_uri.csv file and fetches detailed
 artist information from Spotify API including name, followers, popularity,
 images, href, and genres.
+
+Each output row also carries the Spotify ID, the Wikidata label and a
+fetch_ok flag. Failed fetches keep empty followers/popularity instead of
+zeros so they don't skew averages; run data_quality.py afterwards to check
+the output and re-fetch suspect rows.
 """
 
 import pandas as pd
 import time
 from setup.setupClient import setup_spotify_client
+from setup.logger import get_logger, ProgressReporter
+from setup.profiler import profile_stage, run_profiled
+from genre_index import GenreIndex
+from projection import fetch_batch
+from spotify_ids import clean_id_table, normalize_spotify_id
 import os
 
+logger = get_logger(__name__)
+
 
 def extract_artist_id_from_uri(uri):
     """
-    Extract Spotify artist ID from a full Spotify URI
+    Extract Spotify artist ID from a full Spotify URI (None if invalid)
     Example: https://open.spotify.com/artist/3BJX1nYizKvWpZTY5HOAr4 -> 3BJX1nYizKvWpZTY5HOAr4
     """
-    return uri.split('/')[-1]
+    return normalize_spotify_id(uri)
+
+
+def build_entry(spotify_id, wikidata_label, record):
+    """
+    Build one output row from a projected ArtistRecord (None for a failed fetch)
+    """
+    if record is None:
+        return {
+            'spotify_id': spotify_id,
+            'name': wikidata_label,
+            'followers': None,
+            'popularity': None,
+            'image_url': '',
+            'href': '',
+            'genres': '',
+            'wikidata_label': wikidata_label,
+            'fetch_ok': False
+        }
+
+    entry = record._asdict()
+    del entry['id']
+    return {'spotify_id': spotify_id, **entry,
+            'wikidata_label': wikidata_label, 'fetch_ok': True}
 
 
 def fetch_artist_data():
@@ -28,123 +63,147 @@ def fetch_artist_data():
     # Define file paths
     input_file = "jupyter/artists_SpotifyID_with_uri.csv"
     output_file = "jupyter/artists_detailed_data.csv"
+    rejected_file = "jupyter/artists_detailed_data_rejected.csv"
 
     # Check if input file exists
     if not os.path.exists(input_file):
-        print(f"Error: Input file '{input_file}' not found.")
-        print("Please run add_spotify_uri.py first to generate the CSV with URIs.")
+        logger.error(f"Input file '{input_file}' not found. "
+                     "Please run add_spotify_uri.py first to generate the CSV with URIs.")
         return
 
     try:
         # Setup Spotify client
-        print("Setting up Spotify client...")
-        sp = setup_spotify_client()
+        logger.info("Setting up Spotify client...")
+        with profile_stage('setup_client'):
+            sp = setup_spotify_client()
 
         # Read the CSV file
-        print(f"Reading {input_file}...")
-        df = pd.read_csv(input_file)
+        logger.info(f"Reading {input_file}...")
+        with profile_stage('read_csv'):
+            df = pd.read_csv(input_file)
 
         # Display basic info
-        print(f"DataFrame shape: {df.shape}")
-        print(f"Columns: {list(df.columns)}")
+        logger.info(f"DataFrame shape: {df.shape}")
+        logger.debug(f"Columns: {list(df.columns)}")
+
+        # Validate all IDs up front so bad rows never cost an API call
+        with profile_stage('validate_ids'):
+            df, rejected = clean_id_table(df, 'SpotifyURI', id_column='spotify_id')
+            df = df.reset_index(drop=True)
+        if len(rejected):
+            rejected.to_csv(rejected_file, index=False)
+            logger.warning(
+                f"Skipping {len(rejected)} invalid or duplicate IDs "
+                f"({rejected['error'].value_counts().to_dict()}); saved to {rejected_file}")
 
         # Initialize list to store artist data
         artist_data = []
 
+        # Genre index is updated incrementally as artists are enriched
+        genre_index = GenreIndex.load()
+
         # Process artists with pagination and rate limiting
         total_artists = len(df)
-        batch_size = 10  # Process 10 artists at a time
+        batch_size = 50  # GET /v1/artists takes up to 50 IDs per call
         total_batches = (total_artists + batch_size - 1) // batch_size
 
-        print(f"\nFetching data for {total_artists} artists...")
-        print(
-            f"Processing in batches of {batch_size} artists ({total_batches} batches total)")
-        print("Rate limiting: 1 second sleep after each batch of 10 requests")
+        logger.info(f"Fetching data for {total_artists} artists in batches of "
+                    f"{batch_size} ({total_batches} batches total, 1 second sleep between batches)")
+        progress = ProgressReporter(total_artists, "Fetching artists", logger)
 
         for batch_num in range(total_batches):
             start_idx = batch_num * batch_size
             end_idx = min(start_idx + batch_size, total_artists)
 
-            print(
-                f"\n--- Batch {batch_num + 1}/{total_batches} (artists {start_idx + 1}-{end_idx}) ---")
-
-            # Process current batch
-            for idx in range(start_idx, end_idx):
-                row = df.iloc[idx]
-                try:
-                    # Extract artist ID from URI
-                    artist_id = extract_artist_id_from_uri(row['SpotifyURI'])
-
-                    # Fetch artist data from Spotify API
-                    artist_info = sp.artist(artist_id)
-
-                    # Extract required information with proper null checks
-                    if artist_info is None:
-                        artist_info = {}
-
-                    followers_data = artist_info.get('followers', {})
-                    images_data = artist_info.get('images', [])
+            logger.debug(
+                f"Batch {batch_num + 1}/{total_batches} (artists {start_idx + 1}-{end_idx})")
+
+            batch = df.iloc[start_idx:end_idx]
+            ids = batch['spotify_id'].tolist()
+            labels = batch['artistLabel'].tolist() if 'artistLabel' in batch else [''] * len(ids)
+
+            # One call per batch; records are projected while decoding
+            # (field specs live in projection.ENTITY_FIELDS)
+            try:
+                with profile_stage('api_request'):
+                    records = fetch_batch(sp, 'artist', ids)
+            except Exception as e:
+                logger.warning(f"Batch {batch_num + 1}/{total_batches} "
+                               f"(artists {start_idx + 1}-{end_idx}) failed: {e}")
+                records = None
+
+            with profile_stage('extract_fields'):
+                for offset, (artist_id, label) in enumerate(zip(ids, labels)):
+                    idx = start_idx + offset
+                    record = records[offset] if records is not None else None
+                    # Failed requests still get an (empty) entry
+                    artist_entry = build_entry(artist_id, label, record)
+                    artist_data.append(artist_entry)
 
-                    artist_entry = {
-                        'name': artist_info.get('name', ''),
-                        'followers': followers_data.get('total', 0) if followers_data else 0,
-                        'popularity': artist_info.get('popularity', 0),
-                        'image_url': images_data[0].get('url', '') if images_data else '',
-                        'href': artist_info.get('href', ''),
-                        # Join genres as comma-separated string
-                        'genres': ','.join(artist_info.get('genres', []))
-                    }
+                    if record is None:
+                        if records is not None:
+                            logger.warning(f"{idx + 1}/{total_artists}: "
+                                           f"No data returned for {label} ({artist_id})")
+                        progress.update(failed=1)
+                        continue
 
-                    artist_data.append(artist_entry)
-                    print(
-                        f"  ✓ {idx + 1}/{total_artists}: {artist_entry['name']}")
-
-                except Exception as e:
-                    print(
-                        f"  ✗ {idx + 1}/{total_artists}: Error processing {row.get('artistLabel', 'Unknown')}: {e}")
-                    # Add empty entry for failed requests
-                    artist_data.append({
-                        'name': row.get('artistLabel', ''),
-                        'followers': 0,
-                        'popularity': 0,
-                        'image_url': '',
-                        'href': '',
-                        'genres': ''
-                    })
+                    genre_index.add_artist_entry(artist_id, artist_entry)
+                    logger.debug(f"{idx + 1}/{total_artists}: {artist_entry['name']}",
+                                 extra={'fields': {'spotify_id': artist_id}})
+                    progress.update()
 
             # Rate limiting: 1 second sleep after each batch (except the last batch)
             if batch_num < total_batches - 1:
-                print(f"  ⏳ Rate limiting: sleeping for 1 second...")
-                time.sleep(1)
+                logger.debug("Rate limiting: sleeping for 1 second...")
+                with profile_stage('rate_limit_sleep'):
+                    time.sleep(1)
+
+        progress.close()
 
         # Create new DataFrame with fetched data
-        print("\nCreating DataFrame with fetched data...")
-        result_df = pd.DataFrame(artist_data)
+        logger.info("Creating DataFrame with fetched data...")
+        with profile_stage('build_dataframe'):
+            result_df = pd.DataFrame(artist_data)
+            # Nullable ints keep failed rows empty rather than 0
+            result_df = result_df.astype({'followers': 'Int64', 'popularity': 'Int64'})
 
         # Display sample of results
-        print("\nSample of fetched data:")
-        print(result_df.head())
+        logger.debug(f"Sample of fetched data:\n{result_df.head()}")
 
-        # Display summary statistics
-        print(f"\nSummary:")
-        print(f"  - Total artists processed: {len(result_df)}")
-        print(
-            f"  - Artists with followers > 0: {len(result_df[result_df['followers'] > 0])}")
-        print(f"  - Average popularity: {result_df['popularity'].mean():.2f}")
-        print(
-            f"  - Artists with genres: {len(result_df[result_df['genres'] != ''])}")
+        # Save the results before summarizing, so a bad run can still be inspected
+        logger.info(f"Saving to {output_file}...")
+        with profile_stage('write_csv'):
+            result_df.to_csv(output_file, index=False)
 
-        # Save the results
-        print(f"\nSaving to {output_file}...")
-        result_df.to_csv(output_file, index=False)
+        logger.info(f"Success! Artist data saved to {output_file}")
 
-        print(f"Success! Artist data saved to {output_file}")
+        with profile_stage('save_genre_index'):
+            genre_index.save()
+        logger.info(
+            f"Genre index updated: {len(genre_index)} artists, {len(genre_index.postings)} genres")
+
+        # Display summary statistics
+        summary = {
+            'total_artists': len(result_df),
+            'failed': int((~result_df['fetch_ok']).sum()),
+            'with_followers': int((result_df['followers'] > 0).sum()),
+            # None when every fetch failed (the mean of an all-<NA> column is <NA>)
+            'avg_popularity': round(float(result_df['popularity'].mean()), 2)
+            if result_df['popularity'].notna().any() else None,
+            'with_genres': int((result_df['genres'] != '').sum())
+        }
+        logger.info(
+            f"Summary: {summary['total_artists']} artists processed ({summary['failed']} failed), "
+            f"{summary['with_followers']} with followers > 0, "
+            f"average popularity {summary['avg_popularity']}, "
+            f"{summary['with_genres']} with genres",
+            extra={'fields': summary})
 
         return result_df
 
     except Exception as e:
-        print(f"Error: {e}")
+        logger.exception(f"Error: {e}")
 
 
 if __name__ == "__main__":
-    fetch_artist_data()
+    run_profiled(fetch_artist_data)
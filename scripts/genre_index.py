@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Genre index for enriched Spotify artist data
+
+Builds genre -> artist posting lists (sorted integer arrays) and genre
+co-occurrence counts so genre queries don't need to re-split the
+comma-joined `genres` column on every row. The index can be filled
+incrementally while fetch_artist_data runs, or built from an existing
+artists_detailed_data.csv.
+"""
+
+import bisect
+import csv
+import heapq
+import json
+import os
+from array import array
+from collections import Counter
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from setup.logger import get_logger
+from setup.profiler import profile_stage, run_profiled
+
+logger = get_logger(__name__)
+
+
+DEFAULT_INDEX_FILE = "jupyter/genre_index.json"
+
+
+def split_genres(genres) -> List[str]:
+    """Normalize a genre list or comma-joined genre string into a list"""
+    if not genres:
+        return []
+    if isinstance(genres, str):
+        genres = genres.split(',')
+    return [g.strip() for g in genres if g and g.strip()]
+
+
+class GenreIndex:
+    """Genre -> artist posting lists with co-occurrence counts"""
+
+    def __init__(self):
+        """Initialize an empty index"""
+        # Artist ids are mapped to dense integers so posting lists stay small
+        self.artist_ids: List[str] = []
+        self.artist_names: List[str] = []
+        self.followers = array('q')
+        self.popularity = array('h')
+        self.artist_genres: List[List[str]] = []
+        self._artist_lookup: Dict[str, int] = {}
+        self.postings: Dict[str, array] = {}
+        self.cooccurrence: Dict[str, Counter] = {}
+
+    def __len__(self):
+        return len(self.artist_ids)
+
+    def add_artist(self, spotify_id: str, name: str, followers: int,
+                   popularity: int, genres) -> int:
+        """Add (or update) one artist and return its integer id"""
+        genres = sorted(set(split_genres(genres)))
+        doc = self._artist_lookup.get(spotify_id)
+
+        if doc is not None:
+            # Known artist: refresh metrics and move it to its current genres
+            self.artist_names[doc] = name
+            self.followers[doc] = int(followers or 0)
+            self.popularity[doc] = int(popularity or 0)
+            if genres != self.artist_genres[doc]:
+                self._unindex_genres(doc, self.artist_genres[doc])
+                self._index_genres(doc, genres)
+                self.artist_genres[doc] = genres
+            return doc
+
+        doc = len(self.artist_ids)
+        self._artist_lookup[spotify_id] = doc
+        self.artist_ids.append(spotify_id)
+        self.artist_names.append(name)
+        self.followers.append(int(followers or 0))
+        self.popularity.append(int(popularity or 0))
+        self.artist_genres.append(genres)
+        self._index_genres(doc, genres)
+
+        return doc
+
+    def _index_genres(self, doc: int, genres: List[str]):
+        for genre in genres:
+            docs = self.postings.setdefault(genre, array('I'))
+            if not docs or docs[-1] < doc:
+                docs.append(doc)  # new docs have the highest id
+            else:
+                bisect.insort(docs, doc)
+            counts = self.cooccurrence.setdefault(genre, Counter())
+            for other in genres:
+                if other != genre:
+                    counts[other] += 1
+
+    def _unindex_genres(self, doc: int, genres: List[str]):
+        for genre in genres:
+            docs = self.postings[genre]
+            del docs[bisect.bisect_left(docs, doc)]
+            if not docs:
+                del self.postings[genre]
+            counts = self.cooccurrence[genre]
+            for other in genres:
+                if other != genre:
+                    counts[other] -= 1
+                    if counts[other] <= 0:
+                        del counts[other]
+            if not counts:
+                del self.cooccurrence[genre]
+
+    def add_artist_entry(self, spotify_id: str, artist_entry: Dict[str, Any]) -> int:
+        """Add a row in the format produced by fetch_artist_data"""
+        return self.add_artist(
+            spotify_id,
+            artist_entry.get('name', ''),
+            artist_entry.get('followers', 0),
+            artist_entry.get('popularity', 0),
+            artist_entry.get('genres', '')
+        )
+
+    def artists_in_genre(self, genre: str) -> List[str]:
+        """Return the Spotify IDs of all artists tagged with a genre"""
+        return [self.artist_ids[doc] for doc in self.postings.get(genre, ())]
+
+    def top_artists(self, genre: str, n: int = 10,
+                    by: str = 'followers') -> List[Dict[str, Any]]:
+        """Return the top n artists in a genre by followers or popularity"""
+        metric = self.followers if by == 'followers' else self.popularity
+        docs = heapq.nlargest(
+            n, self.postings.get(genre, ()), key=metric.__getitem__)
+        return [self._artist_record(doc) for doc in docs]
+
+    def overlapping_genres(self, genre: str, n: int = 10) -> List[Tuple[str, int]]:
+        """Return the genres most often co-tagged with a genre"""
+        return self.cooccurrence.get(genre, Counter()).most_common(n)
+
+    def artists_in_all_genres(self, genres: Iterable[str]) -> List[str]:
+        """Return Spotify IDs of artists tagged with every genre given"""
+        lists = sorted((self.postings.get(g, array('I')) for g in genres), key=len)
+        if not lists:
+            return []
+        result = set(lists[0])
+        for docs in lists[1:]:
+            result.intersection_update(docs)
+        return [self.artist_ids[doc] for doc in sorted(result)]
+
+    def genre_distribution(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return per-genre artist count, total followers and mean popularity"""
+        rows = []
+        for genre, docs in self.postings.items():
+            count = len(docs)
+            rows.append({
+                'genre': genre,
+                'artists': count,
+                'total_followers': sum(self.followers[d] for d in docs),
+                'avg_popularity': sum(self.popularity[d] for d in docs) / count
+            })
+        rows.sort(key=lambda r: r['artists'], reverse=True)
+        return rows[:n] if n else rows
+
+    def _artist_record(self, doc: int) -> Dict[str, Any]:
+        return {
+            'spotify_id': self.artist_ids[doc],
+            'name': self.artist_names[doc],
+            'followers': self.followers[doc],
+            'popularity': self.popularity[doc]
+        }
+
+    def save(self, path: str = DEFAULT_INDEX_FILE):
+        """Write the index to a JSON file"""
+        data = {
+            'artist_ids': self.artist_ids,
+            'artist_names': self.artist_names,
+            'followers': self.followers.tolist(),
+            'popularity': self.popularity.tolist(),
+            'artist_genres': self.artist_genres,
+            'postings': {g: docs.tolist() for g, docs in self.postings.items()},
+            'cooccurrence': {g: dict(c) for g, c in self.cooccurrence.items()}
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_FILE) -> 'GenreIndex':
+        """Load an index written by save(), or return an empty one"""
+        index = cls()
+        if not os.path.exists(path):
+            return index
+
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        index.artist_ids = data['artist_ids']
+        index.artist_names = data['artist_names']
+        index.followers = array('q', data['followers'])
+        index.popularity = array('h', data['popularity'])
+        index._artist_lookup = {a: i for i, a in enumerate(index.artist_ids)}
+        index.postings = {g: array('I', docs)
+                          for g, docs in data['postings'].items()}
+        index.cooccurrence = {g: Counter(c)
+                              for g, c in data['cooccurrence'].items()}
+        index.artist_genres = data['artist_genres']
+        return index
+
+    @classmethod
+    def from_csv(cls, path: str, id_column: str = 'spotify_id') -> 'GenreIndex':
+        """Build an index from a CSV with name/followers/popularity/genres columns"""
+        index = cls()
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                spotify_id = row.get(id_column) or row.get('href', '').split('/')[-1]
+                if not spotify_id:
+                    continue
+                index.add_artist(
+                    spotify_id,
+                    row.get('name', ''),
+                    int(float(row.get('followers') or 0)),
+                    int(float(row.get('popularity') or 0)),
+                    row.get('genres', '')
+                )
+        return index
+
+
+def main():
+    """Build the genre index from the enrichment output and log a summary"""
+    input_file = "jupyter/artists_detailed_data.csv"
+
+    if not os.path.exists(input_file):
+        logger.error(f"Input file '{input_file}' not found. Please run fetch_artist_data.py first.")
+        return
+
+    with profile_stage('build_index'):
+        index = GenreIndex.from_csv(input_file)
+    with profile_stage('save_index'):
+        index.save()
+    top_genres = index.genre_distribution(10)
+    logger.info(f"Indexed {len(index)} artists across {len(index.postings)} genres",
+                extra={'fields': {'artists': len(index), 'genres': len(index.postings),
+                                  'top_genres': top_genres}})
+
+    logger.info("Top genres:")
+    for row in top_genres:
+        logger.info(f"  {row['genre']:30} {row['artists']:6d} artists | "
+                    f"avg popularity {row['avg_popularity']:.1f}")
+
+
+if __name__ == "__main__":
+    run_profiled(main, 'genre_index')
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Sorted, memory-mapped Spotify ID index
+
+Builds a binary index from artists_SpotifyID.csv (Wikidata QID <-> Spotify
+ID) that any process can open instantly with no parsing. Worker processes
+that open the same file share it through the page cache instead of each
+holding a DataFrame copy.
+
+File layout (little-endian header, then three contiguous columns sorted by
+key; the fixed-width integer columns come first so they stay aligned):
+
+    header   256 bytes   magic, version, count, source CSV path
+    offsets  count * 8   byte offset of the row in the source CSV (uint64)
+    qids     count * 4   numeric Wikidata QID, e.g. Q1016279 -> 1016279 (uint32)
+    keys     count * 17  Spotify IDs decoded from base62 to big-endian
+                         integers, so byte order == numeric order. 22 base62
+                         digits need up to 131 bits, hence 17 bytes.
+
+Lookups are binary searches over the keys column; lookup_many() searches a
+whole array of IDs at once and merge_join() walks an already-sorted stream.
+
+Usage:
+    python scripts/id_index.py [CSV] [INDEX]
+"""
+
+import csv
+import os
+import struct
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from setup.logger import get_logger
+from setup.profiler import profile_stage, run_profiled
+from spotify_ids import normalize_spotify_id
+
+logger = get_logger(__name__)
+
+INPUT_FILE = "resources/artists_SpotifyID.csv"
+INDEX_FILE = "jupyter/artists_SpotifyID.idx"
+
+MAGIC = b'SPIDIDX\0'
+VERSION = 1
+HEADER_SIZE = 256
+HEADER = struct.Struct('<8sIQH')
+
+BASE62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+_BASE62_VALUE = {c: i for i, c in enumerate(BASE62)}
+KEY_SIZE = 17
+KEY_DTYPE = np.dtype(f'S{KEY_SIZE}')
+
+
+def encode_id(spotify_id: str) -> bytes:
+    """Decode a 22-character base62 Spotify ID into a sortable binary key"""
+    value = 0
+    for c in spotify_id:
+        value = value * 62 + _BASE62_VALUE[c]
+    return value.to_bytes(KEY_SIZE, 'big')
+
+
+def decode_key(key: bytes) -> str:
+    """Turn a binary key back into the 22-character Spotify ID"""
+    value = int.from_bytes(key.ljust(KEY_SIZE, b'\0'), 'big')
+    chars = []
+    for _ in range(22):
+        value, digit = divmod(value, 62)
+        chars.append(BASE62[digit])
+    return ''.join(reversed(chars))
+
+
+def encode_ids(spotify_ids: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode many IDs into (keys, valid mask)
+
+    Invalid IDs get an all-zero key, which is also the key of the valid ID
+    '0000000000000000000000', so callers must check the mask.
+    """
+    keys = []
+    valid = []
+    for spotify_id in spotify_ids:
+        normalized = normalize_spotify_id(spotify_id)
+        keys.append(encode_id(normalized) if normalized else b'')
+        valid.append(normalized is not None)
+    return np.array(keys, dtype=KEY_DTYPE), np.array(valid, dtype=bool)
+
+
+def _parse_qid(value: str) -> int:
+    qid = value.rsplit('/', 1)[-1]
+    return int(qid[1:]) if qid[:1] == 'Q' and qid[1:].isdigit() else 0
+
+
+def build_index(csv_path: str = INPUT_FILE, index_path: str = INDEX_FILE,
+                id_column: str = 'spotifyID', qid_column: str = 'artist') -> int:
+    """Build the index file from a CSV and return the number of entries
+
+    Rows are read line by line to record byte offsets, so the source CSV
+    must not contain quoted newlines. Invalid IDs are skipped and the first
+    row wins for duplicate IDs.
+    """
+    keys: List[bytes] = []
+    offsets: List[int] = []
+    qids: List[int] = []
+    seen = set()
+
+    with open(csv_path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8-sig')]))
+        id_pos, qid_pos = header.index(id_column), header.index(qid_column)
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            row = next(csv.reader([line.decode('utf-8')]), None)
+            if not row or len(row) <= max(id_pos, qid_pos):
+                continue
+            spotify_id = normalize_spotify_id(row[id_pos])
+            if spotify_id is None:
+                continue
+            key = encode_id(spotify_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            keys.append(key)
+            offsets.append(offset)
+            qids.append(_parse_qid(row[qid_pos]))
+
+    key_array = np.array(keys, dtype=KEY_DTYPE)
+    order = np.argsort(key_array, kind='stable')
+    count = len(keys)
+
+    source = os.path.abspath(csv_path).encode('utf-8')
+    if HEADER.size + len(source) > HEADER_SIZE:
+        source = b''
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write((HEADER.pack(MAGIC, VERSION, count, len(source)) + source).ljust(HEADER_SIZE, b'\0'))
+        f.write(np.array(offsets, dtype='<u8')[order].tobytes())
+        f.write(np.array(qids, dtype='<u4')[order].tobytes())
+        f.write(key_array[order].tobytes())
+    os.replace(tmp_path, index_path)
+    return count
+
+
+class IdIndex:
+    """Read-only, memory-mapped view of an index built by build_index()"""
+
+    def __init__(self, index_path: str = INDEX_FILE):
+        with open(index_path, 'rb') as f:
+            magic, version, count, source_len = HEADER.unpack(f.read(HEADER.size))
+            source = f.read(source_len).decode('utf-8')
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{index_path}' is not a Spotify ID index (version {VERSION})")
+
+        self.path = index_path
+        self.source = source or None
+        self.count = count
+
+        # Three read-only views over the same file; nothing is parsed or copied
+        offset = HEADER_SIZE
+        self.offsets = self._column(np.dtype('<u8'), offset)
+        offset += count * 8
+        self.qids = self._column(np.dtype('<u4'), offset)
+        offset += count * 4
+        self.keys = self._column(KEY_DTYPE, offset)
+
+    def _column(self, dtype: np.dtype, offset: int) -> np.ndarray:
+        if not self.count:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=(self.count,))
+
+    def __len__(self):
+        return self.count
+
+    def _position(self, key: bytes) -> Optional[int]:
+        # numpy hands back fixed-width bytes items with trailing NULs stripped; compare alike
+        key = key.rstrip(b'\0')
+        pos = int(np.searchsorted(self.keys, np.array(key, dtype=KEY_DTYPE)))
+        if pos < self.count and self.keys[pos] == key:
+            return pos
+        return None
+
+    def lookup(self, spotify_id: str) -> Optional[Tuple[str, int]]:
+        """Return (QID, CSV byte offset) for a Spotify ID, or None"""
+        normalized = normalize_spotify_id(spotify_id)
+        if normalized is None:
+            return None
+        pos = self._position(encode_id(normalized))
+        if pos is None:
+            return None
+        return f"Q{self.qids[pos]}", int(self.offsets[pos])
+
+    def lookup_many(self, spotify_ids: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized lookup: (found mask, numeric QIDs with 0 where not found)"""
+        keys, valid = encode_ids(spotify_ids)
+        if not self.count:
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype='<u4')
+        pos = np.searchsorted(self.keys, keys)
+        pos_clipped = np.minimum(pos, self.count - 1)
+        found = valid & (pos < self.count) & (self.keys[pos_clipped] == keys)
+        return found, np.where(found, self.qids[pos_clipped], 0)
+
+    def join(self, df, id_column: str = 'spotify_id', qid_column: str = 'wikidata_qid'):
+        """Add a QID column to a DataFrame (missing where the ID is not indexed)"""
+        found, qids = self.lookup_many(df[id_column].astype(str))
+        labels = np.where(found, np.char.add('Q', qids.astype(str)), None)
+        return df.assign(**{qid_column: labels})
+
+    def merge_join(self, sorted_ids: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """Yield (spotify_id, QID) for an ID stream sorted in base62 order
+
+        Base62 order equals ASCII order, so a plain sorted() of IDs works.
+        Walks both sides once without binary searches.
+        """
+        pos = 0
+        for spotify_id in sorted_ids:
+            normalized = normalize_spotify_id(spotify_id)
+            if normalized is None:
+                continue
+            key = encode_id(normalized).rstrip(b'\0')
+            while pos < self.count and self.keys[pos] < key:
+                pos += 1
+            if pos == self.count:
+                return
+            if self.keys[pos] == key:
+                yield spotify_id, f"Q{self.qids[pos]}"
+
+    def read_row(self, spotify_id: str) -> Optional[List[str]]:
+        """Seek straight to an ID's row in the source CSV"""
+        hit = self.lookup(spotify_id)
+        if hit is None or self.source is None:
+            return None
+        with open(self.source, 'rb') as f:
+            f.seek(hit[1])
+            return next(csv.reader([f.readline().decode('utf-8')]))
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else INPUT_FILE
+    index_path = sys.argv[2] if len(sys.argv) > 2 else INDEX_FILE
+
+    if not os.path.exists(csv_path):
+        logger.error(f"Input file '{csv_path}' not found.")
+        return
+
+    start = time.perf_counter()
+    with profile_stage('build_index'):
+        count = build_index(csv_path, index_path)
+    logger.info(f"Indexed {count} Spotify IDs into {index_path} "
+                f"({os.path.getsize(index_path):,} bytes, {time.perf_counter() - start:.2f}s)")
+
+    start = time.perf_counter()
+    index = IdIndex(index_path)
+    logger.info(f"Opened index in {1000 * (time.perf_counter() - start):.2f} ms")
+
+    if count:
+        sample = decode_key(bytes(index.keys[count // 2]))
+        start = time.perf_counter()
+        hit = index.lookup(sample)
+        logger.info(f"Lookup {sample} -> {hit} in {1e6 * (time.perf_counter() - start):.1f} µs")
+        logger.info(f"Row: {index.read_row(sample)}")
+
+
+if __name__ == "__main__":
+    run_profiled(main, 'id_index')
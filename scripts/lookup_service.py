@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Local HTTP lookup service for artist and track metadata
+
+Serves artist and track records from a local store and only goes to
+Spotify on a miss. Concurrent misses are coalesced: requests for the same
+ID share one in-flight lookup, and misses arriving within a short window
+are sent upstream together as a single sp.artists / sp.tracks call.
+
+Endpoints (all GET, JSON responses):
+    /artist/{id}            one artist
+    /track/{id}             one track
+    /artists?ids=a,b,c      several artists in one response
+    /tracks?ids=a,b,c       several tracks in one response
+    /stats                  store size, cache hits, upstream calls
+
+Malformed IDs are rejected with 400 before they reach the shared upstream
+batch; a failed upstream batch answers 502 rather than 404. Records have
+the same fields and types (projection.ENTITY_FIELDS) whether they came from
+the seed CSVs or from Spotify.
+
+Usage:
+    python scripts/lookup_service.py --port 8765
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Any, Optional
+from urllib.parse import urlsplit, parse_qs
+
+from projection import fetch_batch, project_row
+from setup.logger import get_logger
+from setup.profiler import profile_stage, run_profiled
+from spotify_ids import normalize_spotify_id
+
+logger = get_logger(__name__)
+
+STORE_DIR = "jupyter/lookup_store"
+SEED_FILES = {
+    'artist': "resources/spotify_artists_lookup.csv",
+    'track': "resources/spotify_tracks_lookup.csv"
+}
+
+# Spotify's batch endpoints accept up to 50 IDs per call
+MAX_BATCH_SIZE = 50
+BATCH_WINDOW = 0.01
+
+# Seed CSV columns that hold a record field under another name
+SEED_COLUMNS = {
+    'id': ('id', 'spotify_id', 'track_id'),
+    'name': ('name', 'track_name'),
+}
+
+
+class UpstreamError(Exception):
+    """The upstream batch containing a lookup failed"""
+
+
+def seed_record(kind: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce a lookup CSV row into the same record an upstream fetch produces"""
+    row = dict(row)
+    for field, columns in SEED_COLUMNS.items():
+        row[field] = next((row[c] for c in columns if row.get(c)), None)
+    record = project_row(row, kind)._asdict()
+    if kind == 'artist' and not record['href']:
+        record['href'] = f"https://api.spotify.com/v1/artists/{record['id']}"
+    return record
+
+
+class MetadataStore:
+    """Append-only JSON-lines store of projected records, one file per kind"""
+
+    def __init__(self, store_dir: str = STORE_DIR):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.records: Dict[str, Dict[str, Dict[str, Any]]] = {'artist': {}, 'track': {}}
+        for kind in self.records:
+            self._load(kind)
+
+    def _path(self, kind: str) -> str:
+        return os.path.join(self.store_dir, f"{kind}s.jsonl")
+
+    def _load(self, kind: str):
+        path = self._path(kind)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.records[kind][record['id']] = record
+        elif os.path.exists(SEED_FILES[kind]):
+            self._seed(kind, SEED_FILES[kind])
+
+    def _seed(self, kind: str, path: str):
+        """Fill an empty store from the checked-in lookup CSVs"""
+        rows = []
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                record = seed_record(kind, row)
+                if not record['id'] or record['id'] in self.records[kind]:
+                    continue
+                self.records[kind][record['id']] = record
+                rows.append(record)
+        self.put(kind, rows)
+
+    def get(self, kind: str, record_id: str) -> Optional[Dict[str, Any]]:
+        return self.records[kind].get(record_id)
+
+    def put(self, kind: str, records: List[Dict[str, Any]]):
+        """Add records to memory and append them to disk"""
+        if not records:
+            return
+        # Upstream batches complete on executor threads
+        with self._lock, open(self._path(kind), 'a', encoding='utf-8') as f:
+            for record in records:
+                self.records[kind][record['id']] = record
+                f.write(json.dumps(record) + '\n')
+
+
+class BatchCoalescer:
+    """Coalesce concurrent lookups into batched upstream calls
+
+    The first miss opens a short window; every miss arriving before it
+    closes (or before MAX_BATCH_SIZE IDs are pending) goes out in the same
+    upstream call. Requests for an ID that is already in flight await the
+    same future instead of issuing a new request.
+    """
+
+    def __init__(self, fetch_batch: Callable[[List[str]], List[Optional[Dict[str, Any]]]],
+                 window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH_SIZE):
+        self.fetch_batch = fetch_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.pending: List[str] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.upstream_calls = 0
+        self.upstream_ids = 0
+
+    def get(self, record_id: str) -> asyncio.Future:
+        future = self.in_flight.get(record_id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.in_flight[record_id] = future
+        self.pending.append(record_id)
+
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: List[str]):
+        self.upstream_calls += 1
+        self.upstream_ids += len(batch)
+        try:
+            # spotipy is blocking, so run the call in the default thread pool
+            results = await asyncio.get_running_loop().run_in_executor(
+                None, self.fetch_batch, batch)
+        except Exception as e:
+            logger.warning(f"Upstream batch of {len(batch)} failed: {e}")
+            for record_id in batch:
+                future = self.in_flight.pop(record_id)
+                if not future.done():
+                    future.set_exception(UpstreamError(str(e)))
+            return
+
+        # Resolve every waiter, even if upstream returned fewer items
+        results = list(results) + [None] * (len(batch) - len(results))
+        for record_id, result in zip(batch, results):
+            future = self.in_flight.pop(record_id)
+            if not future.done():
+                future.set_result(result)
+
+
+class LookupService:
+    """Store-first lookups with coalesced upstream misses"""
+
+    def __init__(self, store: MetadataStore, upstream):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.coalescers = {
+            'artist': BatchCoalescer(lambda ids: self._fetch(upstream, 'artist', ids)),
+            'track': BatchCoalescer(lambda ids: self._fetch(upstream, 'track', ids))
+        }
+
+    def _fetch(self, upstream, kind: str, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Fetch one batch upstream, project it and write it to the store"""
+        records = [r._asdict() if r else None for r in fetch_batch(upstream, kind, ids)]
+        self.store.put(kind, [r for r in records if r])
+        return records
+
+    async def lookup(self, kind: str, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Records for already-validated IDs; raises UpstreamError if a batch failed"""
+        results: List[Any] = []
+        for record_id in ids:
+            record = self.store.get(kind, record_id)
+            if record is not None:
+                self.hits += 1
+                results.append(record)
+            else:
+                self.misses += 1
+                results.append(self.coalescers[kind].get(record_id))
+        # Await all misses together so they land in the same batch window,
+        # and retrieve every exception so none is left unobserved
+        misses = [r for r in results if isinstance(r, asyncio.Future)]
+        fetched = iter(await asyncio.gather(*misses, return_exceptions=True))
+        results = [next(fetched) if isinstance(r, asyncio.Future) else r for r in results]
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'artists_stored': len(self.store.records['artist']),
+            'tracks_stored': len(self.store.records['track']),
+            'hits': self.hits,
+            'misses': self.misses,
+            'upstream_calls': {k: c.upstream_calls for k, c in self.coalescers.items()},
+            'upstream_ids': {k: c.upstream_ids for k, c in self.coalescers.items()}
+        }
+
+    async def route(self, path: str):
+        """Map a request path to (status, body)"""
+        url = urlsplit(path)
+        parts = [p for p in url.path.split('/') if p]
+
+        if parts == ['stats']:
+            return 200, self.stats()
+
+        if len(parts) == 2 and parts[0] in ('artist', 'track'):
+            kind, ids = parts[0], [parts[1]]
+        elif len(parts) == 1 and parts[0] in ('artists', 'tracks'):
+            kind = parts[0][:-1]
+            ids = [i for i in parse_qs(url.query).get('ids', [''])[0].split(',') if i]
+            if not ids:
+                return 400, {'error': 'ids query parameter is required'}
+        else:
+            return 404, {'error': 'not found'}
+
+        # One bad ID would make Spotify reject the whole shared batch
+        invalid = [i for i in ids if normalize_spotify_id(i, kind) != i]
+        if invalid:
+            return 400, {'error': f"invalid {kind} ID", 'ids': invalid}
+
+        try:
+            records = await self.lookup(kind, ids)
+        except UpstreamError as e:
+            return 502, {'error': f"upstream lookup failed: {e}"}
+
+        if len(parts) == 2:
+            if records[0] is None:
+                return 404, {'error': f"{kind} not found", 'id': ids[0]}
+            return 200, records[0]
+        return 200, {parts[0]: records}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1 handler with keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                if method != 'GET':
+                    status, body = 405, {'error': 'method not allowed'}
+                else:
+                    status, body = await self.route(path)
+
+                payload = json.dumps(body).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError) as e:
+            logger.debug(f"Connection closed: {e}")
+        finally:
+            writer.close()
+
+
+async def serve(service: LookupService, host: str, port: int):
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    logger.info(f"Lookup service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local artist/track lookup service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    from setup.setupClient import setup_spotify_client
+
+    with profile_stage('load_store'):
+        store = MetadataStore()
+    service = LookupService(store, setup_spotify_client())
+    try:
+        with profile_stage('serve'):
+            asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        logger.info(f"Shutting down: {service.stats()}")
+
+
+if __name__ == "__main__":
+    run_profiled(main, 'lookup_service')
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Field projection for Spotify API payloads
+
+Each entity (artist, track, playlist) declares the fields we keep as a list
+of FieldSpecs: a record field name, the path into the API payload, a default
+and an optional transform. From those specs this module builds
+
+  * a typed NamedTuple record per entity (ArtistRecord, TrackRecord, ...)
+  * project(), which turns an already-decoded dict (what spotipy returns)
+    into a record, and project_row() for flat rows such as the lookup CSVs
+  * decode() / decode_batch() / iter_jsonl(), which go straight from raw JSON
+    bytes to records. With msgspec installed the payload is decoded into
+    structs that only declare the projected paths, so unknown fields and the
+    nested dicts around them are skipped instead of materialized. Without it
+    orjson (or the stdlib json module) is used and the dict is projected.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+JSON_BACKEND = 'msgspec' if msgspec else 'orjson' if orjson else 'json'
+
+PathElement = Union[str, int]
+
+
+class FieldSpec(NamedTuple):
+    """One projected field: record name, payload path, type, default, transform
+
+    `payload_type` is the type found at `path` when the transform changes it
+    (e.g. a list of genres joined into one string); it defaults to `type`.
+    """
+    name: str
+    path: Tuple[PathElement, ...]
+    type: type
+    default: Any
+    transform: Optional[Callable[[Any], Any]] = None
+    payload_type: Any = None
+
+
+def _join(values) -> str:
+    return ','.join(values or [])
+
+
+ENTITY_FIELDS: Dict[str, List[FieldSpec]] = {
+    # The fields fetch_artist_data extracts
+    'artist': [
+        FieldSpec('id', ('id',), str, ''),
+        FieldSpec('name', ('name',), str, ''),
+        FieldSpec('followers', ('followers', 'total'), int, 0),
+        FieldSpec('popularity', ('popularity',), int, 0),
+        FieldSpec('image_url', ('images', 0, 'url'), str, ''),
+        FieldSpec('href', ('href',), str, ''),
+        FieldSpec('genres', ('genres',), str, '', _join, List[str]),
+    ],
+    # The columns of spotify_tracks_lookup.csv
+    'track': [
+        FieldSpec('id', ('id',), str, ''),
+        FieldSpec('name', ('name',), str, ''),
+        FieldSpec('artist_name', ('artists', 0, 'name'), str, ''),
+        FieldSpec('artist_id', ('artists', 0, 'id'), str, ''),
+        FieldSpec('album_name', ('album', 'name'), str, ''),
+        FieldSpec('album_id', ('album', 'id'), str, ''),
+        FieldSpec('popularity', ('popularity',), int, 0),
+        FieldSpec('duration_ms', ('duration_ms',), int, 0),
+        FieldSpec('release_date', ('album', 'release_date'), str, ''),
+        FieldSpec('spotify_url', ('external_urls', 'spotify'), str, ''),
+        FieldSpec('preview_url', ('preview_url',), str, ''),
+    ],
+    'playlist': [
+        FieldSpec('id', ('id',), str, ''),
+        FieldSpec('name', ('name',), str, ''),
+        FieldSpec('owner', ('owner', 'display_name'), str, ''),
+        FieldSpec('followers', ('followers', 'total'), int, 0),
+        FieldSpec('tracks_total', ('tracks', 'total'), int, 0),
+        FieldSpec('spotify_url', ('external_urls', 'spotify'), str, ''),
+    ],
+}
+
+
+def _record_type(entity: str, specs: List[FieldSpec]):
+    name = entity.capitalize() + 'Record'
+    return NamedTuple(name, [(spec.name, spec.type) for spec in specs])
+
+
+ArtistRecord = _record_type('artist', ENTITY_FIELDS['artist'])
+TrackRecord = _record_type('track', ENTITY_FIELDS['track'])
+PlaylistRecord = _record_type('playlist', ENTITY_FIELDS['playlist'])
+
+RECORD_TYPES = {
+    'artist': ArtistRecord,
+    'track': TrackRecord,
+    'playlist': PlaylistRecord,
+}
+
+
+def _lookup(obj: Any, path: Tuple[PathElement, ...]) -> Any:
+    """Follow a path through dicts/structs and lists; None if any step is missing"""
+    for key in path:
+        if obj is None:
+            return None
+        if isinstance(key, int):
+            obj = obj[key] if len(obj) > key else None
+        elif isinstance(obj, dict):
+            obj = obj.get(key)
+        else:
+            obj = getattr(obj, key, None)
+    return obj
+
+
+def _to_record(obj: Any, entity: str):
+    values = []
+    for spec in ENTITY_FIELDS[entity]:
+        value = _lookup(obj, spec.path)
+        if spec.transform is not None:
+            value = spec.transform(value)
+        values.append(spec.default if value is None else value)
+    return RECORD_TYPES[entity](*values)
+
+
+def project(payload: Optional[Dict[str, Any]], entity: str):
+    """Project an already-decoded API payload (or None) into a typed record"""
+    return _to_record(payload or {}, entity)
+
+
+def project_row(row: Dict[str, Any], entity: str):
+    """Coerce a flat row keyed by record field names (e.g. a CSV row) into a record
+
+    Values are converted to each field's type; missing, empty or
+    unparseable values get the field default.
+    """
+    values = []
+    for spec in ENTITY_FIELDS[entity]:
+        value = row.get(spec.name)
+        if value is not None and spec.type is int:
+            try:
+                value = int(float(value))
+            except (TypeError, ValueError):
+                value = None
+        elif value is not None:
+            value = spec.type(value)
+        values.append(spec.default if value in (None, '') else value)
+    return RECORD_TYPES[entity](*values)
+
+
+# msgspec structs mirroring only the projected paths of each entity
+_structs: Dict[str, Any] = {}
+
+
+def _build_struct(name: str, paths: List[Tuple[Tuple[PathElement, ...], Any]]):
+    """Build a msgspec Struct type that declares only the given (path, leaf type)s"""
+    children: Dict[str, List[Tuple[Tuple[PathElement, ...], Any]]] = {}
+    for path, leaf_type in paths:
+        children.setdefault(path[0], []).append((path[1:], leaf_type))
+
+    fields = []
+    for key, rests in children.items():
+        leaves = [leaf_type for rest, leaf_type in rests if not rest]
+        rests = [(rest, leaf_type) for rest, leaf_type in rests if rest]
+        if leaves:
+            # Typed leaves make msgspec reject e.g. a string popularity
+            field_type = leaves[0]
+        elif isinstance(rests[0][0][0], int):
+            item = _build_struct(f"{name}_{key}", [(rest[1:], t) for rest, t in rests])
+            field_type = List[item]
+        else:
+            field_type = _build_struct(f"{name}_{key}", rests)
+        fields.append((key, Optional[field_type], None))
+
+    return msgspec.defstruct(name, fields)
+
+
+def _struct_types(entity: str):
+    if entity not in _structs:
+        item = _build_struct(entity.capitalize(), [(s.path, s.payload_type or s.type)
+                                                   for s in ENTITY_FIELDS[entity]])
+        batch = msgspec.defstruct(
+            entity.capitalize() + 'Batch', [(entity + 's', List[Optional[item]], [])])
+        _structs[entity] = (msgspec.json.Decoder(Optional[item]),
+                            msgspec.json.Decoder(batch))
+    return _structs[entity]
+
+
+def loads(raw: Union[bytes, str]) -> Any:
+    """Decode JSON with the fastest available backend"""
+    if msgspec is not None:
+        return msgspec.json.decode(raw)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def decode(raw: Union[bytes, str], entity: str):
+    """Decode one raw API object straight into a record"""
+    if msgspec is not None:
+        return _to_record(_struct_types(entity)[0].decode(raw), entity)
+    return project(loads(raw), entity)
+
+
+def decode_batch(raw: Union[bytes, str], entity: str) -> List[Optional[Any]]:
+    """Decode a batch response such as GET /v1/artists?ids=... into records
+
+    With msgspec, a value of the wrong type anywhere in the batch raises
+    msgspec.ValidationError, which callers treat like a failed request.
+    """
+    if msgspec is not None:
+        items = getattr(_struct_types(entity)[1].decode(raw), entity + 's')
+    else:
+        items = (loads(raw) or {}).get(entity + 's') or []
+    return [_to_record(item, entity) if item is not None else None for item in items]
+
+
+def iter_jsonl(path: str, entity: str) -> Iterator[Any]:
+    """Stream records from a JSON-lines file of raw API objects"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield decode(line, entity)
+
+
+def _raise_spotify_error(response):
+    """Raise an HTTP error the way spotipy's own calls do"""
+    from spotipy.exceptions import SpotifyException
+
+    try:
+        error = loads(response.content).get('error') or {}
+    except Exception:
+        # Not a JSON error body (msgspec's DecodeError is not a ValueError)
+        error = {}
+    message = error.get('message', response.reason) if isinstance(error, dict) else error
+    raise SpotifyException(response.status_code, -1, f"{response.url}:\n {message}",
+                           headers=response.headers)
+
+
+def fetch_batch(sp, entity: str, ids: List[str]) -> List[Optional[Any]]:
+    """Fetch up to 50 artists/tracks in one call and project them
+
+    With msgspec installed the raw response body is decoded directly via
+    spotipy's pooled session (which keeps its retry policy); otherwise the
+    normal spotipy call is used and its dict projected. Either way an HTTP
+    error surfaces as spotipy's SpotifyException with its http_status.
+    """
+    if msgspec is not None and hasattr(sp, '_session') and hasattr(sp, '_auth_headers'):
+        response = sp._session.get(
+            f"{sp.prefix}{entity}s", params={'ids': ','.join(ids)},
+            headers=sp._auth_headers(), timeout=sp.requests_timeout)
+        if response.status_code >= 400:
+            _raise_spotify_error(response)
+        return decode_batch(response.content, entity)
+
+    payload = getattr(sp, entity + 's')(ids) or {}
+    return [project(item, entity) if item else None for item in payload.get(entity + 's') or []]
+
+
+if __name__ == "__main__":
+    print(f"JSON backend: {JSON_BACKEND}")
+    for entity, specs in ENTITY_FIELDS.items():
+        print(f"{entity}: {', '.join(s.name for s in specs)}")
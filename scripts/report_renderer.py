@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Parallel chart rendering for multi-artist reports
+
+Per-artist and comparison charts are described as ChartJobs (chart name,
+input DataFrame, output file). Data frames are prepared once in the parent
+process; the jobs are rendered in a process pool with the Agg backend.
+Each job's input is hashed, and a chart whose hash matches the manifest
+from the previous run (and whose file still exists) is skipped, so a
+500-artist report only redraws what changed.
+
+Usage:
+    python scripts/report_renderer.py [--workers N] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple
+
+import pandas as pd
+
+from setup.logger import get_logger, ProgressReporter
+from setup.profiler import profile_stage, run_profiled
+
+logger = get_logger(__name__)
+
+OUTPUT_DIR = "jupyter/reports"
+MANIFEST_FILE = "manifest.json"
+DPI = 150
+
+# Bump when chart code changes so existing images are redrawn
+RENDERER_VERSION = 1
+
+
+class ChartJob(NamedTuple):
+    chart: str
+    data: pd.DataFrame
+    output: str
+    title: str
+
+
+def data_hash(job: ChartJob) -> str:
+    """Hash of everything that affects the rendered image"""
+    digest = hashlib.sha256()
+    digest.update(f"{job.chart}|{job.title}|{DPI}|{RENDERER_VERSION}".encode('utf-8'))
+    digest.update(','.join(map(str, job.data.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(job.data, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+# Chart functions draw onto a fresh figure; they run in worker processes
+
+def top_tracks_chart(fig, data: pd.DataFrame, title: str):
+    """Horizontal bar chart of one artist's tracks by popularity"""
+    ax = fig.add_subplot(1, 1, 1)
+    data = data.sort_values('popularity').tail(15)
+    ax.barh(data['track_name'], data['popularity'], color='#1DB954')
+    ax.set_xlabel('Popularity Score')
+    ax.set_xlim(0, 100)
+    ax.set_title(title, fontsize=14, fontweight='bold')
+
+
+def followers_comparison_chart(fig, data: pd.DataFrame, title: str):
+    """Bar chart of the most-followed artists"""
+    ax = fig.add_subplot(1, 1, 1)
+    data = data.sort_values('followers').tail(25)
+    ax.barh(data['name'], data['followers'] / 1000000, color='#1DB954')
+    ax.set_xlabel('Followers (Millions)')
+    ax.set_title(title, fontsize=14, fontweight='bold')
+
+
+def popularity_scatter_chart(fig, data: pd.DataFrame, title: str):
+    """Popularity vs followers across all artists"""
+    ax = fig.add_subplot(1, 1, 1)
+    ax.scatter(data['followers'].clip(lower=1), data['popularity'], s=6, alpha=0.4)
+    ax.set_xscale('log')
+    ax.set_xlabel('Followers (log scale)')
+    ax.set_ylabel('Popularity Score')
+    ax.set_title(title, fontsize=14, fontweight='bold')
+
+
+CHARTS: Dict[str, Callable] = {
+    'top_tracks': top_tracks_chart,
+    'followers_comparison': followers_comparison_chart,
+    'popularity_scatter': popularity_scatter_chart,
+}
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render(job: ChartJob) -> str:
+    """Render one chart to its output file (runs in a worker process)"""
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(12, 8))
+    try:
+        CHARTS[job.chart](fig, job.data, job.title)
+        fig.tight_layout()
+        os.makedirs(os.path.dirname(job.output), exist_ok=True)
+        fig.savefig(job.output, dpi=DPI, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return job.output
+
+
+class ReportRenderer:
+    """Render chart jobs in parallel, skipping charts whose inputs are unchanged"""
+
+    def __init__(self, output_dir: str = OUTPUT_DIR, workers: int = None, force: bool = False):
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count()
+        self.force = force
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        self.manifest: Dict[str, str] = {}
+        if os.path.exists(self.manifest_path) and not force:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+    def job(self, chart: str, data: pd.DataFrame, name: str, title: str) -> ChartJob:
+        return ChartJob(chart, data, os.path.join(self.output_dir, name + '.png'), title)
+
+    def render(self, jobs: List[ChartJob]) -> Dict[str, int]:
+        """Render every job whose data hash changed since the last run"""
+        with profile_stage('hash_inputs'):
+            hashes = {job.output: data_hash(job) for job in jobs}
+            todo = [job for job in jobs
+                    if self.manifest.get(job.output) != hashes[job.output]
+                    or not os.path.exists(job.output)]
+
+        stats = {'total': len(jobs), 'rendered': 0, 'skipped': len(jobs) - len(todo), 'failed': 0}
+        logger.info(f"{len(todo)} of {len(jobs)} charts changed; rendering with {self.workers} workers")
+
+        progress = ProgressReporter(len(todo), "Rendering charts", logger)
+        with profile_stage('render'), ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker) as executor:
+            futures = {job.output: executor.submit(_render, job) for job in todo}
+            for output, future in futures.items():
+                try:
+                    future.result()
+                    self.manifest[output] = hashes[output]
+                    stats['rendered'] += 1
+                    progress.update()
+                except Exception as e:
+                    logger.warning(f"Could not render {output}: {e}")
+                    stats['failed'] += 1
+                    progress.update(failed=1)
+        progress.close()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        return stats
+
+
+def build_jobs(renderer: ReportRenderer, artists: pd.DataFrame, tracks: pd.DataFrame) -> List[ChartJob]:
+    """Prepare all data frames once and describe the report's charts"""
+    jobs = []
+
+    if not tracks.empty:
+        # One chart per artist from the precomputed group slices
+        # Search-term rows carry the title in `name` rather than `track_name`
+        tracks = tracks.assign(track_name=tracks['track_name'].fillna(tracks['name']))
+        tracks = tracks.dropna(subset=['artist_id', 'track_name', 'popularity'])
+        for artist_id, group in tracks.groupby('artist_id', sort=True):
+            data = group[['track_name', 'popularity']].drop_duplicates('track_name').reset_index(drop=True)
+            jobs.append(renderer.job('top_tracks', data, f"artists/{artist_id}",
+                                     f"{group['artist_name'].iloc[0]} - Top Tracks by Popularity"))
+
+    if not artists.empty:
+        data = artists[['name', 'followers', 'popularity']].reset_index(drop=True)
+        jobs.append(renderer.job('followers_comparison', data, 'comparison/followers',
+                                 'Most Followed Artists'))
+        jobs.append(renderer.job('popularity_scatter', data, 'comparison/popularity_vs_followers',
+                                 'Popularity vs Followers'))
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render report charts in parallel")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='Redraw every chart')
+    args = parser.parse_args()
+
+    artists_file = "jupyter/artists_detailed_data.csv"
+    tracks_file = "resources/spotify_tracks_lookup.csv"
+
+    with profile_stage('read_csv'):
+        artists = pd.read_csv(artists_file) if os.path.exists(artists_file) else pd.DataFrame()
+        tracks = pd.read_csv(tracks_file) if os.path.exists(tracks_file) else pd.DataFrame()
+
+    renderer = ReportRenderer(workers=args.workers, force=args.force)
+    jobs = build_jobs(renderer, artists, tracks)
+    stats = renderer.render(jobs)
+    logger.info(f"Charts: {stats['rendered']} rendered, {stats['skipped']} unchanged, "
+                f"{stats['failed']} failed -> {renderer.output_dir}")
+
+
+if __name__ == "__main__":
+    run_profiled(main, 'report_renderer')
@@ -0,0 +1,155 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Optional
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        # Structured fields passed as logger.info(..., extra={'fields': {...}})
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps a record's traceback out of its message
+
+    The stock prepare() formats the traceback into `msg` and clears the
+    exception, so JsonFormatter could never emit its `exception` key.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # Render now; the traceback must not outlive the calling frame
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: Optional[str] = None, json_format: Optional[bool] = None):
+    """Route all logging through a queue so callers never block on I/O
+
+    Level and format default to the LOG_LEVEL and LOG_FORMAT (text|json)
+    environment variables. Calling this more than once is a no-op.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    if json_format is None:
+        json_format = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
+
+    handler = logging.StreamHandler(sys.stderr)
+    if json_format:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)-7s %(name)s: %(message)s', '%H:%M:%S'))
+
+    # Worker threads only enqueue records; one listener thread does the writes
+    log_queue: queue.Queue = queue.Queue(-1)
+    _listener = logging.handlers.QueueListener(
+        log_queue, handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.handlers = [_QueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a logger; handlers are left to setup_logging() in entry points
+
+    Importing a module must not replace the caller's logging configuration
+    (e.g. a notebook's), so nothing is configured here.
+    """
+    return logging.getLogger(name)
+
+
+class ProgressReporter:
+    """Rate-limited progress logging with throughput and ETA
+
+    update() is cheap enough to call once per item from any thread; a log
+    record is only emitted every `interval` seconds.
+    """
+
+    def __init__(self, total: int, desc: str, logger: logging.Logger,
+                 interval: float = 2.0):
+        self.total = total
+        self.desc = desc
+        self.logger = logger
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._last_report = self._start
+
+    def update(self, n: int = 1, failed: int = 0):
+        """Record n processed items (of which `failed` failed)"""
+        with self._lock:
+            self.done += n
+            self.failed += failed
+            now = time.monotonic()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+        self._report(now)
+
+    def close(self):
+        """Emit the final progress line"""
+        self._report(time.monotonic(), final=True)
+
+    def _report(self, now: float, final: bool = False):
+        elapsed = max(now - self._start, 1e-9)
+        rate = self.done / elapsed
+        remaining = max(self.total - self.done, 0)
+        eta = remaining / rate if rate > 0 else float('inf')
+        pct = 100.0 * self.done / self.total if self.total else 100.0
+
+        fields = {
+            'progress': self.desc,
+            'done': self.done,
+            'total': self.total,
+            'failed': self.failed,
+            'rows_per_s': round(rate, 2),
+            'elapsed_s': round(elapsed, 1),
+            'eta_s': round(eta, 1) if eta != float('inf') else None
+        }
+        if final:
+            message = (f"{self.desc}: {self.done}/{self.total} done in {elapsed:.1f}s "
+                       f"({rate:.1f} rows/s, {self.failed} failed)")
+        else:
+            message = (f"{self.desc}: {self.done}/{self.total} ({pct:.1f}%) | "
+                       f"{rate:.1f} rows/s | ETA {eta:.0f}s")
+        self.logger.info(message, extra={'fields': fields})
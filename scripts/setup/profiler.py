@@ -0,0 +1,225 @@
+import argparse
+import contextlib
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable
+
+
+PROFILE_DIR = "profiles"
+
+_active: Optional['RunProfiler'] = None
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class RunProfiler:
+    """Collect per-stage wall time, CPU time and allocation peaks for one run"""
+
+    def __init__(self, name: str, trace_memory: bool = True):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._stack: List[Dict[str, Any]] = []
+        self._started_at = datetime.now().isoformat(timespec='seconds')
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+        self._wall = 0.0
+        self._cpu = 0.0
+        self._run_peak = 0
+
+    def _fold_peak(self, peak: int):
+        """Carry a traced-memory peak up to the enclosing stage and the run"""
+        if self._stack:
+            parent = self._stack[-1]
+            parent['peak'] = max(parent['peak'], peak)
+        self._run_peak = max(self._run_peak, peak)
+
+    def start(self):
+        """Begin timing the whole run"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def stop(self):
+        """Finish timing the whole run"""
+        self._wall = time.perf_counter() - self._wall_start
+        self._cpu = time.process_time() - self._cpu_start
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Time a block; repeated entries of the same stage are accumulated"""
+        frame = {'peak': 0, 'base': 0}
+        if self.trace_memory:
+            # Resetting drops the peak seen so far; hand it to the parent first
+            self._fold_peak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            frame['base'] = tracemalloc.get_traced_memory()[0]
+        self._stack.append(frame)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak = 0
+            self._stack.pop()
+            if self.trace_memory:
+                # Nested stages reset the peak, so fold in what they saw
+                peak = max(tracemalloc.get_traced_memory()[1], frame['peak'])
+                self._fold_peak(peak)
+            # Report the peak growth above what was allocated on entry
+            peak = max(peak - frame['base'], 0)
+
+            record = self.stages.setdefault(name, {
+                'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_alloc_bytes': 0})
+            record['calls'] += 1
+            record['wall_s'] += wall
+            record['cpu_s'] += cpu
+            record['peak_alloc_bytes'] = max(record['peak_alloc_bytes'], peak)
+
+    def report(self) -> Dict[str, Any]:
+        """Return the run report as a JSON-serializable dict"""
+        stages = {}
+        for name, record in self.stages.items():
+            stages[name] = dict(
+                record,
+                wall_s=round(record['wall_s'], 6),
+                cpu_s=round(record['cpu_s'], 6),
+                wall_pct=round(100 * record['wall_s'] / self._wall, 2) if self._wall else 0.0
+            )
+
+        report = {
+            'script': self.name,
+            'started_at': self._started_at,
+            'argv': sys.argv,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'total': {'wall_s': round(self._wall, 6), 'cpu_s': round(self._cpu, 6)},
+            'stages': stages
+        }
+        if self.trace_memory and tracemalloc.is_tracing():
+            report['total']['peak_alloc_bytes'] = max(
+                self._run_peak, tracemalloc.get_traced_memory()[1])
+        return report
+
+
+def profile_stage(name: str):
+    """Context manager timing a stage when profiling is on, a no-op otherwise"""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name)
+
+
+def _parse_profile_args():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-stage timings and write a JSON report')
+    parser.add_argument('--profile-dir', default=PROFILE_DIR,
+                        help='Directory for profile reports')
+    parser.add_argument('--profile-cprofile', action='store_true',
+                        help='Also write cProfile stats (.prof)')
+    parser.add_argument('--profile-pyinstrument', action='store_true',
+                        help='Also write a pyinstrument HTML report, if installed')
+    parser.add_argument('--profile-no-memory', action='store_true',
+                        help='Skip tracemalloc allocation tracking')
+    args, remaining = parser.parse_known_args()
+
+    # Leave the remaining arguments for the script's own parser
+    sys.argv = sys.argv[:1] + remaining
+    return args
+
+
+def run_profiled(func: Callable, name: Optional[str] = None):
+    """Run a script entry point, profiling it if --profile (or PROFILE=1) is given
+
+    Also configures logging, since this is where a script starts.
+    """
+    global _active
+    from setup.logger import setup_logging
+
+    setup_logging()
+    options = _parse_profile_args()
+    if not (options.profile or os.getenv('PROFILE') == '1'):
+        return func()
+
+    name = name or func.__name__
+    profiler = RunProfiler(name, trace_memory=not options.profile_no_memory)
+    _active = profiler
+
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    os.makedirs(options.profile_dir, exist_ok=True)
+    base_path = os.path.join(options.profile_dir, f"{name}-{stamp}")
+
+    cprof = cProfile.Profile() if options.profile_cprofile else None
+    instrument = None
+    if options.profile_pyinstrument:
+        try:
+            from pyinstrument import Profiler
+            instrument = Profiler()
+        except ImportError:
+            print("pyinstrument is not installed; skipping --profile-pyinstrument")
+
+    profiler.start()
+    if cprof:
+        cprof.enable()
+    if instrument:
+        instrument.start()
+    try:
+        return func()
+    finally:
+        if instrument:
+            instrument.stop()
+        if cprof:
+            cprof.disable()
+        profiler.stop()
+        _active = None
+
+        report = profiler.report()
+        if cprof:
+            cprof.dump_stats(base_path + '.prof')
+            report['cprofile_file'] = base_path + '.prof'
+        if instrument:
+            with open(base_path + '.html', 'w', encoding='utf-8') as f:
+                f.write(instrument.output_html())
+            report['pyinstrument_file'] = base_path + '.html'
+
+        with open(base_path + '.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        tracemalloc.stop()
+        print(f"Profile report saved to {base_path}.json")
+
+
+def compare_reports(old_path: str, new_path: str):
+    """Print per-stage wall/CPU/memory deltas between two profile reports"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    print(f"{'stage':24} {'wall old':>10} {'wall new':>10} {'delta':>8} "
+          f"{'cpu new':>10} {'peak MB':>9}")
+    rows = [('TOTAL', old['total'], new['total'])]
+    for stage in sorted(set(old['stages']) | set(new['stages'])):
+        rows.append((stage, old['stages'].get(stage, {}), new['stages'].get(stage, {})))
+
+    for stage, before, after in rows:
+        wall_old = before.get('wall_s', 0.0)
+        wall_new = after.get('wall_s', 0.0)
+        delta = f"{100 * (wall_new - wall_old) / wall_old:+.1f}%" if wall_old else 'new'
+        peak_mb = after.get('peak_alloc_bytes', 0) / 1e6
+        print(f"{stage:24} {wall_old:10.3f} {wall_new:10.3f} {delta:>8} "
+              f"{after.get('cpu_s', 0.0):10.3f} {peak_mb:9.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python scripts/setup/profiler.py OLD_REPORT.json NEW_REPORT.json")
+        sys.exit(1)
+    compare_reports(sys.argv[1], sys.argv[2])
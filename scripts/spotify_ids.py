@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Vectorized Spotify URI/ID normalization and validation
+
+Accepts any mix of bare IDs, spotify:artist:<id> URIs, open.spotify.com
+URLs (with or without intl-xx path prefixes and query strings) and
+api.spotify.com hrefs, and reduces them to the 22-character base62 ID.
+Whole columns are processed with compiled regexes through pandas' string
+methods, so malformed and duplicate IDs are reported before any API call
+is made.
+"""
+
+import re
+from typing import Optional, Tuple
+
+import pandas as pd
+
+
+ID_PATTERN = r'[0-9A-Za-z]{22}'
+
+# Capture group 1 is the kind found in the reference (artist, track, ...),
+# group 2 the ID itself
+REFERENCE_RE = re.compile(
+    r'^\s*(?:'
+    r'spotify:(?P<uri_kind>[a-z]+):'
+    r'|(?:https?://)?open\.spotify\.com/(?:intl-[a-z]{2}(?:-[a-zA-Z]{2})?/)?(?P<url_kind>[a-z]+)/'
+    r'|(?:https?://)?api\.spotify\.com/v1/(?P<api_kind>[a-z]+)s/'
+    r')?'
+    r'(?P<id>[^/?#\s]*)'
+    r'(?:[/?#]\S*)?\s*$'
+)
+ID_RE = re.compile(rf'^{ID_PATTERN}$')
+
+
+def normalize_spotify_ids(values: pd.Series, kind: str = 'artist') -> pd.DataFrame:
+    """Normalize a column of Spotify references
+
+    Returns a frame aligned with `values` with columns spotify_id (None when
+    invalid) and error (None when valid).
+    """
+    raw = values.astype('string')
+    parts = raw.str.extract(REFERENCE_RE)
+
+    found_kind = parts['uri_kind'].fillna(parts['url_kind']).fillna(parts['api_kind'])
+    candidate = parts['id']
+    well_formed = candidate.str.match(ID_RE).fillna(False).astype(bool)
+    kind_ok = found_kind.isna() | (found_kind == kind)
+
+    error = pd.Series(pd.NA, index=values.index, dtype='string')
+    error = error.mask(~well_formed, 'not a 22-character base62 ID')
+    error = error.mask(~kind_ok.astype(bool), found_kind.fillna('') + f' reference, expected {kind}')
+    error = error.mask(parts['id'].isna() & raw.notna(), 'unrecognized reference')
+    error = error.mask(raw.isna() | (raw.str.strip() == ''), 'missing')
+
+    spotify_id = candidate.where(error.isna())
+    return pd.DataFrame({'spotify_id': spotify_id, 'error': error}, index=values.index)
+
+
+def clean_id_table(df: pd.DataFrame, column: str, kind: str = 'artist',
+                   id_column: str = 'spotify_id') -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Normalize `column` into `id_column`, dropping invalid and duplicate rows
+
+    Returns (clean rows, rejected rows with an `error` column).
+    """
+    normalized = normalize_spotify_ids(df[column], kind)
+    df = df.assign(**{id_column: normalized['spotify_id']})
+
+    invalid = normalized['error'].notna()
+    duplicate = ~invalid & df.duplicated(subset=[id_column], keep='first')
+
+    rejected = df[invalid | duplicate].assign(
+        error=normalized['error'].where(invalid, 'duplicate ID'))
+    clean = df[~(invalid | duplicate)]
+    return clean, rejected
+
+
+def normalize_spotify_id(value: str, kind: str = 'artist') -> Optional[str]:
+    """Normalize a single reference; None if it is not a valid ID of `kind`"""
+    # Missing values from a DataFrame column arrive as NaN, not None
+    if not isinstance(value, str):
+        return None
+    match = REFERENCE_RE.match(value)
+    if not match or not ID_RE.match(match.group('id')):
+        return None
+    found_kind = match.group('uri_kind') or match.group('url_kind') or match.group('api_kind')
+    if found_kind and found_kind != kind:
+        return None
+    return match.group('id')
+
+
+def spotify_url(spotify_id: str, kind: str = 'artist') -> str:
+    return f"https://open.spotify.com/{kind}/{spotify_id}"
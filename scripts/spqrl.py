@@ -1,67 +1,347 @@
+#!/usr/bin/env python3
+"""
+Harvest Wikidata musicians with a Spotify artist ID (P1902)
+
+Complete harvests are cached locally, keyed by the normalized query text,
+so reruns don't hit the Wikidata Query Service again. Pages are ordered by
+entity and only a finished harvest is cached, so an interrupted run never
+mixes pages from two different query executions. The harvested mapping is
+kept in a state file; with --incremental only entities whose
+schema:dateModified is newer than the last harvest are queried and merged,
+and the added, removed and changed Spotify IDs are recorded.
+
+Usage:
+    python scripts/spqrl.py                  # full harvest (uses cache)
+    python scripts/spqrl.py --incremental    # only entities modified since last run
+    python scripts/spqrl.py --refresh        # ignore cached results
+"""
+
+import argparse
 import csv
-import requests
+import hashlib
+import json
+import os
+import re
 import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+import requests
+
+from setup.logger import get_logger
+from setup.profiler import profile_stage, run_profiled
+
+logger = get_logger(__name__)
 
 SPARQL_ENDPOINT = "https://query.wikidata.org/sparql"
 LIMIT = 100
-MAX_ROWS = 1000
-
-all_results = []
-
-for offset in range(0, MAX_ROWS, LIMIT):
-    print(f"Fetching results {offset} to {offset + LIMIT}...")
-
-    query = f"""
-    SELECT ?artist ?artistLabel ?spotifyID WHERE {{
-      ?artist wdt:P31 wd:Q5;
-              wdt:P106 wd:Q639669;
-              wdt:P1902 ?spotifyID.
-      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
-    }}
-    LIMIT {LIMIT}
-    OFFSET {offset}
-    """
 
-    headers = {
-        "Accept": "application/sparql-results+json",
-        "User-Agent": "YourAppName/1.0 (your@email.com)"
-    }
+CACHE_DIR = "jupyter/sparql_cache"
+STATE_FILE = "jupyter/wikidata_harvest.json"
+CHANGES_FILE = "jupyter/wikidata_changes.jsonl"
+CACHE_MAX_AGE = timedelta(days=7)
+OUTPUT_FILE = "spotify_artist_ids.csv"
+
+# Re-query a little before the last harvest to cover query service lag;
+# merging is idempotent so the overlap is harmless
+INCREMENTAL_OVERLAP = timedelta(hours=1)
+
+HEADERS = {
+    "Accept": "application/sparql-results+json",
+    "User-Agent": "YourAppName/1.0 (your@email.com)"
+}
+
+FULL_QUERY = """
+SELECT ?artist ?artistLabel ?spotifyID WHERE {
+  ?artist wdt:P31 wd:Q5;
+          wdt:P106 wd:Q639669;
+          wdt:P1902 ?spotifyID.
+  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}
+ORDER BY ?artist ?spotifyID
+"""
+
+# OPTIONAL so that entities which lost their Spotify ID are returned too
+INCREMENTAL_QUERY = """
+SELECT ?artist ?artistLabel ?spotifyID WHERE {
+  ?artist wdt:P31 wd:Q5;
+          wdt:P106 wd:Q639669;
+          schema:dateModified ?modified.
+  FILTER(?modified >= "{since}"^^xsd:dateTime)
+  OPTIONAL { ?artist wdt:P1902 ?spotifyID. }
+  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}
+ORDER BY ?artist ?spotifyID
+"""
+
+PAGE = """
+LIMIT {limit}
+OFFSET {offset}
+"""
+
 
-    response = requests.get(SPARQL_ENDPOINT, params={
-                            "query": query}, headers=headers)
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and drop comments so equivalent queries share a cache key"""
+    lines = [re.sub(r'\s+#.*$', '', line) for line in query.splitlines()]
+    return ' '.join(' '.join(lines).split())
+
+
+class SparqlCache:
+    """On-disk cache of complete harvests' bindings keyed by normalized query text"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, enabled: bool = True,
+                 max_age: timedelta = CACHE_MAX_AGE, write: bool = True):
+        self.cache_dir = cache_dir
+        # `enabled` controls reads; `write` whether results are stored
+        self.enabled = enabled
+        self.write = write
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, query: str) -> str:
+        key = hashlib.sha256(normalize_query(query).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, query: str) -> Optional[Tuple[List[Dict[str, Any]], datetime]]:
+        """Return (bindings, fetched_at) for a cached query, or None"""
+        path = self._path(query)
+        if not self.enabled or not os.path.exists(path):
+            self.misses += 1
+            return None
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+
+        fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        if datetime.now(timezone.utc) - fetched_at > self.max_age:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry['bindings'], fetched_at
+
+    def put(self, query: str, bindings: List[Dict[str, Any]], fetched_at: datetime):
+        """Store the bindings for a query, as fetched at `fetched_at`"""
+        if not self.write:
+            return
+        path = self._path(query)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'query': normalize_query(query),
+                'fetched_at': fetched_at.isoformat(timespec='seconds'),
+                'bindings': bindings
+            }, f)
+        os.replace(tmp_path, path)
+
+
+def run_query(session: requests.Session, query: str) -> Optional[List[Dict[str, Any]]]:
+    """Run one SPARQL query; returns None on HTTP errors"""
+    with profile_stage('sparql_request'):
+        response = session.get(SPARQL_ENDPOINT, params={"query": query})
 
     if response.status_code != 200:
-        print(f"Error: {response.status_code}, stopping early.")
-        break
-
-    data = response.json()
-    results = data["results"]["bindings"]
-
-    if not results:
-        print("No more data found.")
-        break
-
-    for r in results:
-        artist_name = r["artistLabel"]["value"]
-        artist_uri = r["artist"]["value"]
-        spotify_id = r["spotifyID"]["value"]
-        all_results.append({
-            "name": artist_name,
-            "wikidata_id": artist_uri.split("/")[-1],
-            "spotify_id": spotify_id,
-            "spotify_url": f"https://open.spotify.com/artist/{spotify_id}"
-        })
+        logger.error(f"Error: {response.status_code}, stopping early.")
+        return None
+
+    with profile_stage('parse_json'):
+        bindings = response.json()["results"]["bindings"]
 
     # Be nice to Wikidata – wait a bit
     time.sleep(1)
+    return bindings
+
+
+def harvest(session: requests.Session, cache: SparqlCache, query: str,
+            max_rows: Optional[int]) -> Optional[Tuple[Dict[str, Dict[str, Any]], bool, datetime]]:
+    """Page through a query and group the results as {qid: {name, spotify_ids}}
+
+    Returns (artists, truncated, fetched_at), or None if a request failed.
+    `truncated` is True when max_rows stopped the harvest before the last
+    page; such a partial result is not cached. `fetched_at` is when the
+    data was queried, which for a cached result can be days ago.
+    """
+    cached = cache.get(query)
+    truncated = False
+
+    if cached is not None:
+        bindings, fetched_at = cached
+    else:
+        fetched_at = datetime.now(timezone.utc)
+        bindings = []
+        while True:
+            if max_rows is not None and len(bindings) >= max_rows:
+                truncated = True
+                break
+            logger.info(f"Fetching results {len(bindings)} to {len(bindings) + LIMIT}...")
+            results = run_query(session, query + PAGE.format(limit=LIMIT, offset=len(bindings)))
+
+            if results is None:
+                return None
+            bindings.extend(results)
+            if len(results) < LIMIT:
+                logger.info("No more data found.")
+                break
+        if not truncated:
+            cache.put(query, bindings, fetched_at)
+
+    if max_rows is not None and len(bindings) > max_rows:
+        bindings = bindings[:max_rows]
+        truncated = True
+
+    artists: Dict[str, Dict[str, Any]] = {}
+    for r in bindings:
+        qid = r["artist"]["value"].split("/")[-1]
+        entry = artists.setdefault(qid, {
+            "name": r.get("artistLabel", {}).get("value", qid),
+            "spotify_ids": []
+        })
+        spotify_id = r.get("spotifyID", {}).get("value")
+        if spotify_id and spotify_id not in entry["spotify_ids"]:
+            entry["spotify_ids"].append(spotify_id)
+
+    return artists, truncated, fetched_at
+
+
+def diff_harvests(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Compare the Spotify IDs of entities present in `new` against `old`"""
+    changes = {'added': [], 'removed': [], 'changed': []}
+    for qid, entry in new.items():
+        before = set(old.get(qid, {}).get('spotify_ids', []))
+        after = set(entry['spotify_ids'])
+        if before == after:
+            continue
+        record = {'wikidata_id': qid, 'name': entry['name'],
+                  'old': sorted(before), 'new': sorted(after)}
+        if not before:
+            changes['added'].append(record)
+        elif not after:
+            changes['removed'].append(record)
+        else:
+            changes['changed'].append(record)
+    return changes
+
+
+def load_state() -> Dict[str, Any]:
+    """Load the last harvest, or an empty state"""
+    if not os.path.exists(STATE_FILE):
+        return {'last_harvest': None, 'artists': {}}
+    with open(STATE_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state: Dict[str, Any]):
+    tmp_path = STATE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def write_csv(artists: Dict[str, Dict[str, Any]], path: str = OUTPUT_FILE):
+    """Write one row per (artist, Spotify ID) pair"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=["name", "wikidata_id", "spotify_id", "spotify_url"])
+        writer.writeheader()
+        for qid, entry in sorted(artists.items()):
+            for spotify_id in entry["spotify_ids"]:
+                writer.writerow({
+                    "name": entry["name"],
+                    "wikidata_id": qid,
+                    "spotify_id": spotify_id,
+                    "spotify_url": f"https://open.spotify.com/artist/{spotify_id}"
+                })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only query entities modified since the last harvest')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore cached SPARQL results')
+    parser.add_argument('--max-rows', type=int, default=0,
+                        help='Stop after this many result rows for a quick sample CSV; '
+                             'a truncated harvest does not update the state (0 = no limit)')
+    args = parser.parse_args()
+
+    state = load_state()
+    max_rows = args.max_rows or None
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    cache = SparqlCache(enabled=not args.refresh)
+
+    if args.incremental and state['last_harvest']:
+        since = datetime.fromisoformat(state['last_harvest']) - INCREMENTAL_OVERLAP
+        since_str = since.strftime('%Y-%m-%dT%H:%M:%SZ')
+        logger.info(f"Incremental harvest of entities modified since {since_str}")
+        # An incremental query is only valid once: always go to the server
+        # and don't store a result nothing will ever read again
+        cache.enabled = False
+        cache.write = False
+        result = harvest(session, cache, INCREMENTAL_QUERY.replace("{since}", since_str), max_rows)
+    else:
+        if args.incremental:
+            logger.info("No previous harvest found, running a full harvest")
+        result = harvest(session, cache, FULL_QUERY, max_rows)
+
+    if result is None:
+        logger.error("Harvest failed; state left unchanged.")
+        return
+    modified, truncated, fetched_at = result
+
+    if truncated:
+        # Missing rows would look like removed IDs, and advancing last_harvest
+        # would skip the modifications past the limit for good
+        logger.warning(f"Harvest stopped at --max-rows {max_rows}; writing the partial "
+                       f"result to {OUTPUT_FILE} without updating {STATE_FILE}")
+        with profile_stage('write_csv'):
+            write_csv(modified)
+        logger.info(f"✅ Total artists: {len(modified)}")
+        return
+
+    with profile_stage('merge'):
+        old_artists = state['artists']
+        changes = diff_harvests(old_artists, modified)
+
+        if args.incremental and state['last_harvest']:
+            artists = dict(old_artists)
+            for qid, entry in modified.items():
+                if entry['spotify_ids']:
+                    artists[qid] = entry
+                else:
+                    artists.pop(qid, None)
+        else:
+            artists = modified
+            # Entities missing from a full harvest have lost their ID
+            for qid in old_artists.keys() - modified.keys():
+                changes['removed'].append({
+                    'wikidata_id': qid, 'name': old_artists[qid]['name'],
+                    'old': sorted(old_artists[qid]['spotify_ids']), 'new': []})
+
+    # Edits after the data was fetched (e.g. a cached harvest) are picked up
+    # by the next incremental run
+    state = {'last_harvest': fetched_at.isoformat(timespec='seconds'), 'artists': artists}
+    save_state(state)
+
+    with open(CHANGES_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({
+            'harvested_at': state['last_harvest'],
+            'mode': 'incremental' if args.incremental else 'full',
+            **changes
+        }) + '\n')
+
+    with profile_stage('write_csv'):
+        write_csv(artists)
 
-print(f"\n✅ Total records fetched: {len(all_results)}")
+    logger.info(f"Cache: {cache.hits} hits, {cache.misses} misses")
+    logger.info(
+        f"Changes: {len(changes['added'])} added, {len(changes['removed'])} removed, "
+        f"{len(changes['changed'])} changed")
+    logger.info(f"✅ Total artists: {len(artists)}")
+    logger.info(f"📁 Saved to: {OUTPUT_FILE}")
 
-# Save to CSV
-with open("spotify_artist_ids.csv", "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(
-        f, fieldnames=["name", "wikidata_id", "spotify_id", "spotify_url"])
-    writer.writeheader()
-    writer.writerows(all_results)
 
-print("📁 Saved to: wikidata_ethiopian_artists_spotify.csv")
+if __name__ == "__main__":
+    run_profiled(main, 'spqrl')
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scripts are run as flat modules from scripts/, so import them the same way
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
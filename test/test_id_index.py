@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+from id_index import IdIndex, build_index, decode_key, encode_id, KEY_SIZE
+
+# Keys at the edges of the 17-byte encoding
+ZERO_ID = '0' * 22                                        # all-zero key
+LEADING_ZEROS_ID = '0' * 21 + '1'                         # 16 leading zero bytes
+TRAILING_ZERO_ID = decode_key(b'\x05' + b'\xab' * 14 + b'\x00\x00')
+MAX_ID = 'z' * 22                                         # needs all 131 bits
+REGULAR_ID = '3TVXtAsR1Inumwj472S9r4'
+MISSING_ID = '6DCZcSspjsKoFjzjrWoCdn'
+
+ROWS = [
+    ('Q1016279', 'Zoë Ünicode, "quoted"', REGULAR_ID),
+    ('Q2', 'Zero', ZERO_ID),
+    ('Q3', 'Leading', LEADING_ZEROS_ID),
+    ('Q4', 'Trailing', TRAILING_ZERO_ID),
+    ('Q5', 'Max', MAX_ID),
+    ('Q6', 'Invalid', 'not-an-id'),
+    ('Q7', 'Duplicate', REGULAR_ID),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    csv_path = tmp_path / 'artists.csv'
+    pd.DataFrame(ROWS, columns=['artist', 'artistLabel', 'spotifyID']).to_csv(csv_path, index=False)
+    index_path = tmp_path / 'artists.idx'
+    assert build_index(str(csv_path), str(index_path)) == 5
+    return IdIndex(str(index_path))
+
+
+@pytest.mark.parametrize('spotify_id', [ZERO_ID, LEADING_ZEROS_ID, TRAILING_ZERO_ID, MAX_ID, REGULAR_ID])
+def test_encode_decode_round_trip(spotify_id):
+    key = encode_id(spotify_id)
+    assert len(key) == KEY_SIZE
+    assert decode_key(key) == spotify_id
+    # numpy hands keys back with trailing NULs stripped
+    assert decode_key(key.rstrip(b'\0')) == spotify_id
+
+
+def test_keys_sort_like_ids():
+    ids = sorted([ZERO_ID, LEADING_ZEROS_ID, TRAILING_ZERO_ID, MAX_ID, REGULAR_ID, MISSING_ID])
+    assert sorted(ids, key=encode_id) == ids
+
+
+def test_trailing_zero_key_really_ends_in_zero():
+    assert encode_id(TRAILING_ZERO_ID).endswith(b'\0\0')
+    assert encode_id(LEADING_ZEROS_ID).startswith(b'\0' * 16)
+
+
+@pytest.mark.parametrize('spotify_id, qid', [
+    (REGULAR_ID, 'Q1016279'),
+    (ZERO_ID, 'Q2'),
+    (LEADING_ZEROS_ID, 'Q3'),
+    (TRAILING_ZERO_ID, 'Q4'),
+    (MAX_ID, 'Q5'),
+])
+def test_lookup(index, spotify_id, qid):
+    assert index.lookup(spotify_id)[0] == qid
+    assert index.lookup(f'spotify:artist:{spotify_id}')[0] == qid
+
+
+def test_lookup_misses(index):
+    assert index.lookup(MISSING_ID) is None
+    assert index.lookup('not-an-id') is None
+
+
+def test_lookup_many(index):
+    ids = [TRAILING_ZERO_ID, MISSING_ID, ZERO_ID, 'not-an-id', LEADING_ZEROS_ID, MAX_ID, None]
+    found, qids = index.lookup_many(ids)
+    assert found.tolist() == [True, False, True, False, True, True, False]
+    assert qids.tolist() == [4, 0, 2, 0, 3, 5, 0]
+
+
+def test_join(index):
+    df = pd.DataFrame({'spotify_id': [REGULAR_ID, MISSING_ID]})
+    qids = index.join(df)['wikidata_qid']
+    assert qids[0] == 'Q1016279'
+    assert pd.isna(qids[1])
+
+
+def test_merge_join(index):
+    stream = sorted([MISSING_ID, ZERO_ID, TRAILING_ZERO_ID, LEADING_ZEROS_ID, MAX_ID, REGULAR_ID])
+    assert dict(index.merge_join(stream)) == {
+        ZERO_ID: 'Q2',
+        LEADING_ZEROS_ID: 'Q3',
+        TRAILING_ZERO_ID: 'Q4',
+        REGULAR_ID: 'Q1016279',
+        MAX_ID: 'Q5',
+    }
+
+
+def test_read_row_follows_byte_offsets(index):
+    # The first row has multi-byte characters and a quoted comma before later rows
+    assert index.read_row(REGULAR_ID) == ['Q1016279', 'Zoë Ünicode, "quoted"', REGULAR_ID]
+    assert index.read_row(MAX_ID) == ['Q5', 'Max', MAX_ID]
+    assert index.read_row(MISSING_ID) is None
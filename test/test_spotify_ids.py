@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from spotify_ids import clean_id_table, normalize_spotify_id, normalize_spotify_ids
+
+ARTIST_ID = '3TVXtAsR1Inumwj472S9r4'
+TRACK_ID = '6DCZcSspjsKoFjzjrWoCdn'
+
+
+@pytest.mark.parametrize('value', [
+    ARTIST_ID,
+    f'  {ARTIST_ID}  ',
+    f'spotify:artist:{ARTIST_ID}',
+    f'https://open.spotify.com/artist/{ARTIST_ID}',
+    f'open.spotify.com/artist/{ARTIST_ID}',
+    f'https://open.spotify.com/intl-de/artist/{ARTIST_ID}?si=abc123',
+    f'https://open.spotify.com/intl-pt-BR/artist/{ARTIST_ID}/',
+    f'https://api.spotify.com/v1/artists/{ARTIST_ID}',
+])
+def test_normalize_accepts_reference_forms(value):
+    assert normalize_spotify_id(value) == ARTIST_ID
+
+
+@pytest.mark.parametrize('value', [
+    f'spotify:track:{TRACK_ID}',
+    f'https://open.spotify.com/track/{TRACK_ID}',
+    f'https://api.spotify.com/v1/tracks/{TRACK_ID}',
+])
+def test_normalize_rejects_wrong_kind(value):
+    assert normalize_spotify_id(value) is None
+    assert normalize_spotify_id(value, kind='track') == TRACK_ID
+
+
+@pytest.mark.parametrize('value', [
+    ARTIST_ID[:21],
+    ARTIST_ID + 'x',
+    ARTIST_ID[:21] + '-',
+    f'spotify:artist:{ARTIST_ID[:21]}',
+    f'https://open.spotify.com/artist/{ARTIST_ID}x?si=1',
+    'https://example.com/artist/' + ARTIST_ID,
+    '',
+    None,
+])
+def test_normalize_rejects_malformed(value):
+    assert normalize_spotify_id(value) is None
+
+
+def test_vectorized_matches_scalar():
+    values = pd.Series([
+        f'spotify:artist:{ARTIST_ID}',
+        f'https://open.spotify.com/intl-fr/artist/{ARTIST_ID}?si=x',
+        f'spotify:track:{TRACK_ID}',
+        ARTIST_ID[:21],
+        ARTIST_ID + 'A',
+        None,
+        '',
+    ])
+    result = normalize_spotify_ids(values)
+
+    assert list(result.index) == list(values.index)
+    for value, spotify_id in zip(values, result['spotify_id']):
+        expected = normalize_spotify_id(value)
+        assert (None if pd.isna(spotify_id) else spotify_id) == expected
+    # Every rejected value gets a reason, every accepted one none
+    assert (result['spotify_id'].isna() == result['error'].notna()).all()
+    assert result['error'][2] == 'track reference, expected artist'
+    assert result['error'][5] == 'missing'
+    assert result['error'][6] == 'missing'
+
+
+def test_clean_id_table_drops_invalid_and_duplicates():
+    df = pd.DataFrame({
+        'label': ['a', 'b', 'c', 'd'],
+        'uri': [
+            f'https://open.spotify.com/artist/{ARTIST_ID}',
+            f'spotify:artist:{ARTIST_ID}',
+            'not-an-id',
+            TRACK_ID,
+        ],
+    })
+    clean, rejected = clean_id_table(df, 'uri')
+
+    assert clean['label'].tolist() == ['a', 'd']
+    assert clean['spotify_id'].tolist() == [ARTIST_ID, TRACK_ID]
+    assert rejected.set_index('label')['error'].to_dict() == {
+        'b': 'duplicate ID',
+        'c': 'not a 22-character base62 ID',
+    }